@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+from blackjack_sim import (
+    I18Strategy,
+    run_simulations,
+)
+from blackjack_sim.bankroll import (
+    OutcomeModel,
+    ramp,
+    simulate_bankroll,
+)
+
+# Play the cards once, logging every round, then answer bankroll
+# questions for any ramp and bankroll by resampling those rounds.
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as log_dir:
+        run_simulations([I18Strategy], n_shoes=5000, workers=os.cpu_count(), seed=0, log_dir=log_dir)
+        model = OutcomeModel.from_logs(log_dir)
+
+    for max_bet in (6, 12):
+        ev, var = model.moments(ramp(1, max_bet))
+        print(f"1-{max_bet} ramp: {ev:.4f} units/round, sd {var ** .5:.2f}, N0 {model.n0(ramp(1, max_bet)):,.0f} rounds")
+        result = simulate_bankroll(model, ramp(1, max_bet), bankroll=200, n_rounds=100_000, n_paths=2000)
+        print(result.summary())
@@ -1,9 +1,8 @@
+import os
+
 from blackjack_sim import (
     DumbassStrategy,
-    Dealer,
-    Game,
-    Player,
-    Shoe,
+    run_simulations,
 )
 
 # In this setup, only 5 out of the six decks are ever played. In 
@@ -12,39 +11,11 @@ from blackjack_sim import (
 # one deck in. In expectation, he should lose ~20% less on average
 # when he arrives late.
 
-def iter_full():
-    dealer = Dealer()
-    shoe = Shoe(n_decks=6, pen=.85)
-    dumbass_strategy = DumbassStrategy(dealer=dealer, shoe=shoe)
-    players = [
-        Player(strategy=dumbass_strategy),
-    ]
-    game = Game(
-        dealer=dealer,
-        shoe=shoe,
-        players=players
-    )
-    game.play()
-    return players[0].balance
-
-def iter_part():
-    # Same set up 
-    dealer = Dealer()
-    shoe = Shoe(idx=52, n_decks=6, pen=.85)
-    dumbass_strategy = DumbassStrategy(dealer=dealer, shoe=shoe)
-    players = [
-        Player(strategy=dumbass_strategy),
-    ]
-    game = Game(
-        dealer=dealer,
-        shoe=shoe,
-        players=players
-    )
-    game.play()
-    return players[0].balance
-
-nsims = 3000
-full_outcomes = [iter_full() for _ in range(nsims)]
-part_outcomes = [iter_part() for _ in range(nsims)]
+if __name__ == "__main__":
+    nsims = 3000
+    workers = os.cpu_count()
+    full = run_simulations([DumbassStrategy], n_shoes=nsims, workers=workers, seed=0, n_decks=6, pen=.85)
+    # Late arrival sees the same shoes, one deck in
+    part = run_simulations([DumbassStrategy], n_shoes=nsims, workers=workers, seed=0, n_decks=6, pen=.85, idx=52)
 
-print(sum(part_outcomes) / sum(full_outcomes))
\ No newline at end of file
+    print(part.balances.sum() / full.balances.sum())
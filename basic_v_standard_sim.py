@@ -1,3 +1,7 @@
+import os
+import tempfile
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
@@ -5,38 +9,30 @@ import seaborn as sns
 
 from blackjack_sim import (
     DumbassStrategy,
-    Dealer,
-    Game,
-    Player,
-    Shoe,
-    StandardStrategy
+    RoundLog,
+    StandardStrategy,
+    run_simulations,
 )
+from blackjack_sim.roundlog import SCHEMA_FILE
 
-def iter():
-    dealer = Dealer()
-    shoe = Shoe(n_decks=6, pen=.85)
-    dumbass_strategy = DumbassStrategy(dealer=dealer, shoe=shoe)
-    standard_strategy = StandardStrategy(dealer=dealer, shoe=shoe)
-    players = [
-        Player(strategy=dumbass_strategy),
-        Player(strategy=standard_strategy)
-    ]
-    game = Game(
-        dealer=dealer,
-        shoe=shoe,
-        players=players
-    )
-    game.play()
-    return game.player_balances
+# Both strategies play the same shoes; the standard strategy's balance is
+# plotted round by round, one line per shoe.
 
-nsims = 100
-outcomes = np.array([iter() for _ in range(nsims)])
+if __name__ == "__main__":
+    nsims = 100
+    with tempfile.TemporaryDirectory() as log_dir:
+        run_simulations(
+            [DumbassStrategy, StandardStrategy], n_shoes=nsims, workers=os.cpu_count(),
+            seed=0, n_decks=6, pen=.85, log_dir=log_dir,
+        )
+        logs = sorted(p.parent for p in (Path(log_dir) / "strategy_1").rglob(SCHEMA_FILE))
+        columns = [RoundLog.read(log) for log in logs]
+        df = pd.DataFrame({
+            'time': np.concatenate([c["round"] for c in columns]),
+            'series': np.concatenate([c["shoe"] for c in columns]),
+            'value': np.concatenate([c["balance"][:, 0] for c in columns]),
+        })
 
-df = pd.DataFrame({
-    'time': np.tile(np.arange(outcomes.shape[2]), outcomes.shape[0]),
-    'series': np.repeat(np.arange(outcomes.shape[0]), outcomes.shape[2]),
-    'value': outcomes[:,1,:].ravel()
-})
-# print(df)
-sns.lineplot(x='time', y='value', hue='series', data=df)
-plt.show()
\ No newline at end of file
+    # print(df)
+    sns.lineplot(x='time', y='value', hue='series', data=df)
+    plt.show()
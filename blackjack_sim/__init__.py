@@ -1,4 +1,16 @@
 from .base import *
 from .players import *
 from .strategy import *
-from .game import *
\ No newline at end of file
+from .game import *
+from .observers import ConsoleObserver, GameObserver
+from .vector import VectorGame, random_shoes, shoe_ranks
+from .runner import PairedComparison, PrecisionResult, SimulationResult, compare_strategies, run_simulations, run_until_precision
+from .session import Session, SessionResult, run_sessions
+from .stats import RunningStats
+from .counting import COUNT_SYSTEMS, register_count_system
+from .roundlog import RoundLog
+from .instrument import Instrumentation
+from .probability import dealer_probabilities, remaining_composition
+from .cache import ResultCache
+from .rng import shoe_order, shoe_orders
+from .rules import Rules
@@ -0,0 +1,185 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from blackjack_sim.roundlog import (
+    SCHEMA_FILE,
+    RoundLog,
+)
+
+
+class OutcomeModel:
+    """Empirical distribution of a round's net result per unit bet, by true count bucket.
+
+    The bucket of a round is its starting true count truncated to an integer,
+    as the bet ramps in strategy.py use it, and clipped to `lowest`..`highest`.
+    Playing decisions do not depend on the bet, so results are stored per unit
+    bet and any ramp can be applied afterwards.
+    """
+
+    def __init__(self, true_count: np.ndarray, bet: np.ndarray, net: np.ndarray, lowest: int = -5, highest: int = 10):
+        self.buckets = np.arange(lowest, highest + 1)
+        bucket = np.clip(np.trunc(true_count), lowest, highest).astype(int) - lowest
+        unit_net = net / bet
+        # Every recorded round as a (bucket, distinct per unit outcome) cell
+        self.outcomes, outcome = np.unique(unit_net, return_inverse=True)
+        self.cells = bucket * len(self.outcomes) + outcome
+        counts = np.bincount(self.cells, minlength=len(self.buckets) * len(self.outcomes))
+        self.n_rounds = len(unit_net)
+        # Joint probability of (bucket, outcome)
+        self.joint = counts.reshape(len(self.buckets), len(self.outcomes)) / self.n_rounds
+
+    @classmethod
+    def from_logs(cls, paths: str | Path | list, seat: int = 0, **kwargs) -> "OutcomeModel":
+        # A RoundLog directory, a directory holding them, such as a run_simulations
+        # log_dir, or a list of either
+        paths = [paths] if isinstance(paths, (str, Path)) else paths
+        logs = []
+        for path in map(Path, paths):
+            logs.extend([path] if (path / SCHEMA_FILE).exists() else sorted(p.parent for p in path.rglob(SCHEMA_FILE)))
+        if not logs:
+            raise ValueError(f"No round logs found in {paths}.")
+        columns = [RoundLog.read(log) for log in logs]
+        return cls(
+            true_count=np.concatenate([c["true_count"] for c in columns]),
+            bet=np.concatenate([c["bet"][:, seat] for c in columns]),
+            net=np.concatenate([c["net"][:, seat] for c in columns]),
+            **kwargs,
+        )
+
+    def bucket_probabilities(self) -> np.ndarray:
+        return self.joint.sum(axis=1)
+
+    def round_values(self, ramp: Callable | np.ndarray) -> np.ndarray:
+        # (bucket, outcome) net result in units for a ramp giving the bet of each bucket
+        bets = ramp(self.buckets) if callable(ramp) else np.asarray(ramp, dtype=float)
+        return bets[:, None] * self.outcomes[None, :]
+
+    def moments(self, ramp: Callable | np.ndarray) -> tuple[float, float]:
+        values = self.round_values(ramp)
+        ev = (self.joint * values).sum()
+        return ev, (self.joint * values ** 2).sum() - ev ** 2
+
+    def n0(self, ramp: Callable | np.ndarray) -> float:
+        # Rounds for the expected win to equal one standard deviation, never for a losing ramp
+        ev, var = self.moments(ramp)
+        return var / ev ** 2 if ev > 0 else np.inf
+
+
+def ramp(min_bet: float = 1, max_bet: float = 6) -> Callable:
+    # One unit per true count between the bounds, as StandardStrategy bets
+    return lambda buckets: np.clip(buckets, min_bet, max_bet).astype(float)
+
+
+@dataclass
+class BankrollResult:
+    bankroll: float
+    n_rounds: int
+    rounds_per_hour: float
+    # Per path; -1 when it never happened within n_rounds
+    ruin_round: np.ndarray
+    double_round: np.ndarray
+    max_drawdown: np.ndarray
+    final: np.ndarray
+    # Bankroll quantiles at `checkpoints` rounds, shape (len(checkpoints), len(QUANTILES))
+    checkpoints: np.ndarray
+    trajectory_quantiles: np.ndarray
+
+    QUANTILES = (.01, .05, .25, .5, .75, .95, .99)
+
+    def risk_of_ruin(self) -> float:
+        return float((self.ruin_round >= 0).mean())
+
+    def hours_to_double(self, q=(.25, .5, .75)) -> np.ndarray:
+        # Paths that never double count as infinitely slow
+        rounds = np.where(self.double_round >= 0, self.double_round, np.inf)
+        return np.quantile(rounds, q, method="inverted_cdf") / self.rounds_per_hour
+
+    def drawdown_quantiles(self, q=(.5, .9, .99)) -> np.ndarray:
+        return np.quantile(self.max_drawdown, q)
+
+    def summary(self) -> str:
+        double = self.hours_to_double()
+        drawdown = self.drawdown_quantiles()
+        return "\n".join([
+            f"{len(self.final)} paths of {self.n_rounds} rounds from {self.bankroll:g} units",
+            f"risk of ruin    {self.risk_of_ruin():.4f}",
+            f"doubled         {(self.double_round >= 0).mean():.4f}",
+            f"hours to double {', '.join(f'{h:.1f}' for h in double)} (quartiles)",
+            f"max drawdown    {', '.join(f'{d:.1f}' for d in drawdown)} (p50, p90, p99)",
+            f"final bankroll  {np.mean(self.final):.1f} mean, {np.median(self.final):.1f} median",
+        ])
+
+
+def simulate_bankroll(
+    model: OutcomeModel,
+    ramp: Callable | np.ndarray,
+    bankroll: float,
+    n_rounds: int,
+    n_paths: int = 10_000,
+    rounds_per_hour: float = 100,
+    n_checkpoints: int = 20,
+    rng: np.random.Generator | None = None,
+    chunk_size: int = 1 << 21,
+) -> BankrollResult:
+    """Resamples rounds from `model` to play out `n_paths` bankroll trajectories.
+
+    Each round is one of the recorded rounds drawn uniformly at random, bet
+    with `ramp` for its true count bucket, so no cards are dealt. A path
+    is ruined once the bankroll reaches zero and stops there. Rounds are
+    generated `chunk_size` at a time, which bounds memory whatever the
+    number of paths and rounds.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    # Net result of every recorded round under the ramp; float32 is exact for half units
+    values = model.round_values(ramp).ravel()[model.cells].astype(np.float32)
+
+    balance = np.full(n_paths, bankroll, dtype=np.float32)
+    peak = balance.copy()
+    max_drawdown = np.zeros(n_paths)
+    ruin_round = np.full(n_paths, -1)
+    double_round = np.full(n_paths, -1)
+    checkpoints = np.unique(np.linspace(0, n_rounds, n_checkpoints + 1).astype(int)[1:])
+    trajectory_quantiles = np.zeros((len(checkpoints), len(BankrollResult.QUANTILES)))
+
+    step = max(1, chunk_size // n_paths)
+    done = 0
+    while done < n_rounds:
+        n = min(step, n_rounds - done)
+        draws = values[rng.integers(0, len(values), (n_paths, n))]
+        # Ruined paths stay at zero
+        draws[ruin_round >= 0] = 0
+        path = balance[:, None] + np.cumsum(draws, axis=1)
+
+        ruined = path <= 0
+        first_ruin = np.where(ruined.any(axis=1), ruined.argmax(axis=1), n)
+        path = np.where(np.arange(n)[None, :] >= first_ruin[:, None], 0, path)
+        ruin_round = np.where((ruin_round < 0) & (first_ruin < n), done + first_ruin + 1, ruin_round)
+
+        doubled = path >= 2 * bankroll
+        first_double = np.where(doubled.any(axis=1), doubled.argmax(axis=1), -1)
+        double_round = np.where((double_round < 0) & (first_double >= 0), done + first_double + 1, double_round)
+
+        running_peak = np.maximum(peak[:, None], np.maximum.accumulate(path, axis=1))
+        max_drawdown = np.maximum(max_drawdown, (running_peak - path).max(axis=1))
+        peak = running_peak[:, -1]
+
+        for i, checkpoint in enumerate(checkpoints):
+            if done < checkpoint <= done + n:
+                trajectory_quantiles[i] = np.quantile(path[:, checkpoint - done - 1], BankrollResult.QUANTILES)
+        balance = path[:, -1]
+        done += n
+
+    return BankrollResult(
+        bankroll=bankroll,
+        n_rounds=n_rounds,
+        rounds_per_hour=rounds_per_hour,
+        ruin_round=ruin_round,
+        double_round=double_round,
+        max_drawdown=max_drawdown,
+        final=balance,
+        checkpoints=checkpoints,
+        trajectory_quantiles=trajectory_quantiles,
+    )
@@ -1,16 +1,16 @@
-from collections import Counter
 from enum import Enum
-import random
 
 import numpy as np
 
+from blackjack_sim.counting import COUNT_SYSTEMS
+from blackjack_sim.rng import shoe_order
+
 class Action(Enum):
     SPLIT="split"
     HIT="hit"
     DHIT="dhit"
     STAY="stay"
-    # TODO: implement surrender
-    # TODO: implement so that ace splits can only be hit once
+    SURRENDER="surrender"
 
 ACTION_MAPPING = {
     "D": Action.DHIT,
@@ -18,7 +18,12 @@ ACTION_MAPPING = {
     "H": Action.HIT
 }
 
+# Indexed by Card.rank; aces count as 11 until a Hand needs them to be 1
+RANK_VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10)
+
 class Card:
+    __slots__ = ("rank", "value", "name")
+
     def __init__(self, rank: int, value: int):     
         self.rank: int = rank
         self.value: int = value
@@ -41,120 +46,265 @@ class Card:
             return "K"
         else:
             return str(self.rank + 1)
+
+# Dealer upcard column by rank: A, 2-9, then every ten-valued card
+UPCARD_INDEX = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9, 9)
+
+# Hand.state() rows: hard totals, then soft totals, then pairs by card value
+SOFT_STATE = 22
+PAIR_STATE = 44
+N_STATES = 56
+
+# Cards are immutable, so one instance per rank is shared by every shoe and hand
+CARDS = tuple(Card(rank=i, value=v) for i, v in enumerate(RANK_VALUES))
         
 
 class Shoe:
-    def __init__(self, n_decks: int = 6, idx: int = 0, pen: float = .9):
-        self.n_decks = n_decks
-        self.shoe_size = n_decks * 52
-        self.cards = self._init_cards()
+    def __init__(
+        self,
+        n_decks: int = 6,
+        idx: int = 0,
+        pen: float = .9,
+        rng: np.random.Generator | None = None,
+        count_systems: tuple[str, ...] = ("hi_lo",),
+        cards: np.ndarray | None = None,
+        backup_cards: np.ndarray | None = None,
+        reshuffle_discards: bool = False,
+    ):
+        # Given card orders are shared, not copied, so several shoes can deal the same cards
+        self.n_decks = n_decks if cards is None else len(cards) // 52
+        # Shuffles come from this generator so a seeded shoe can be replayed
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.shoe_size = self.n_decks * 52
+        # Writable card order owned by this shoe, only ever shuffled in place, see reshuffle
+        self._buffer: np.ndarray | None = self._init_cards() if cards is None else None
+        # Set once forks read the buffer, which is then copied before it is shuffled
+        self._forked = False
+        # Card ranks in deal order, never written to
+        self.cards: np.ndarray = _read_only(self._buffer if cards is None else cards)
         self.idx = idx
+        self.pen = pen
         self.pen_idx = int(self.shoe_size * pen)
-        self.backup_cards = self._init_cards()
+        # Running out mid-round either deals from a backup deck, dealt from the end,
+        # or shuffles the cards of the finished rounds back in like a dealer would
+        self.reshuffle_discards = reshuffle_discards
+        if reshuffle_discards:
+            backup_cards = np.zeros(0, dtype=np.uint8)
+        self.backup_cards: np.ndarray = _read_only(self._init_cards() if backup_cards is None else backup_cards)
+        self._backup_left = len(self.backup_cards)
         self.card_counts: np.array = self._init_card_counts()
         self.reserved_count_card = None
+        # Index of the first card of the round being dealt, see start_round
+        self._round_start = idx
+
+        # Running counts are kept in step with card_counts, one per system
+        self.count_systems = tuple(count_systems)
+        self._count_index = {name: i for i, name in enumerate(self.count_systems)}
+        self._rank_tags = tuple(zip(*(COUNT_SYSTEMS[name] for name in self.count_systems)))
+        self.running_counts: list[int] = [
+            int(np.dot(self.card_counts, COUNT_SYSTEMS[name])) for name in self.count_systems
+        ]
     
-    def _init_cards(self) -> list[Card]:
-        cards = []
-        for _ in range(self.n_decks):
-            for _ in range(4):
-                for i in range(13):
-                    if i == 0:
-                        # Aces are initialized as soft aces
-                        cards.append(Card(rank=i, value=11))
-                    elif i >= 9:
-                        cards.append(Card(rank=i, value=10))
-                    else:
-                        cards.append(Card(rank=i, value=i+1))
-        random.shuffle(cards)
-        return cards
+    def _init_cards(self) -> np.ndarray:
+        return self.rng.permutation(np.tile(np.arange(13, dtype=np.uint8), 4 * self.n_decks))
+
+    @classmethod
+    def from_order(cls, cards: np.ndarray, **kwargs) -> "Shoe":
+        return cls(cards=cards, **kwargs)
+
+    @classmethod
+    def from_deal_order(cls, ranks: np.ndarray, **kwargs) -> "Shoe":
+        # A shoe then its backup deck, in the order they are dealt, see rng.shoe_orders
+        n_cards = len(ranks) // 2
+        return cls(cards=ranks[:n_cards], backup_cards=ranks[n_cards:][::-1], **kwargs)
+
+    @classmethod
+    def from_corpus(cls, corpus, index: int, **kwargs) -> "Shoe":
+        # Shoe `index` of a corpus.ShoeCorpus, dealt straight from its memory map
+        return cls.from_deal_order(corpus[index], **kwargs)
+
+    @classmethod
+    def from_seed(cls, seed: int, index: int, n_decks: int = 6, **kwargs) -> "Shoe":
+        # Shoe `index` of a seeded run, regenerated without the shoes before it
+        return cls.from_deal_order(shoe_order(seed, index, n_decks), **kwargs)
+
+    def fork(self) -> "Shoe":
+        # Independent cursor at the same position over the same cards
+        if self.reserved_count_card is not None:
+            raise RuntimeError("Cannot fork a shoe while a card is reserved.")
+        shoe = Shoe(
+            idx=self.idx,
+            pen=self.pen,
+            rng=self.rng,
+            count_systems=self.count_systems,
+            cards=self.cards,
+            backup_cards=self.backup_cards,
+            reshuffle_discards=self.reshuffle_discards,
+        )
+        shoe._backup_left = self._backup_left
+        self._forked = True
+        return shoe
 
     def _init_card_counts(self) -> np.array:
-        card_counts = np.zeros(13)
-        if self.idx > 0:
-            for c, deals in Counter(self.cards[:self.idx]).items():
-                card_counts[c.rank] += deals
-        return card_counts
+        return np.bincount(self.cards[:self.idx], minlength=13).astype(float)
     
     def deal(self, reserve_count=False) -> Card:
-        # temporary backstop for midround shoe depletion
         if self.idx >= len(self.cards):
-            return self.backup_cards.pop()
+            if self.reshuffle_discards:
+                self._reshuffle_discards()
+                return self.deal(reserve_count)
+            if self._backup_left == 0:
+                raise RuntimeError("The shoe and its backup deck ran out in the same round.")
+            self._backup_left -= 1
+            return CARDS[self.backup_cards[self._backup_left]]
         
-        card = self.cards[self.idx]
+        card = CARDS[self.cards[self.idx]]
         if reserve_count:
             if self.reserved_count_card is not None:
                 raise RuntimeError("Only one card should be reserved at a given time.")
             else:
                 self.reserved_count_card = card
         else:
-            self.card_counts[card.rank] += 1
+            self._count(card.rank)
         self.idx += 1
         return card
     
+    def start_round(self):
+        # Cards from here on are on the table until the round is settled
+        self._round_start = self.idx
+
+    def reshuffle(self):
+        """Shuffles every card back into the shoe in place and starts it over with zero counts."""
+        if self.reserved_count_card is not None:
+            raise RuntimeError("Cannot reshuffle a shoe while a card is reserved.")
+        self.rng.shuffle(self._own_cards())
+        self.idx = self._round_start = 0
+        self._backup_left = len(self.backup_cards)
+        self.card_counts[:] = 0
+        self.running_counts[:] = [0] * len(self.running_counts)
+
+    def _reshuffle_discards(self):
+        # The shoe ran out mid-round: the cards of the finished rounds are shuffled
+        # into a new shoe behind the ones on the table, which stay dealt. The
+        # counts restart from the cards on the table a player has seen.
+        buffer = self._own_cards()
+        if self._round_start == 0:
+            raise RuntimeError("A single round used up the whole shoe.")
+        on_table = buffer[self._round_start:].copy()
+        discards = buffer[:self._round_start]
+        self.rng.shuffle(discards)
+        buffer[len(on_table):] = discards
+        buffer[:len(on_table)] = on_table
+        self.idx = len(on_table)
+        self._round_start = 0
+        self.card_counts[:] = np.bincount(on_table, minlength=13)
+        if self.reserved_count_card is not None:
+            self.card_counts[self.reserved_count_card.rank] -= 1
+        self.running_counts[:] = [int(np.dot(self.card_counts, COUNT_SYSTEMS[name])) for name in self.count_systems]
+
+    def _own_cards(self) -> np.ndarray:
+        # A shared card order is copied once, the first time this shoe shuffles it,
+        # and so is an owned one that forks still deal from
+        if self._buffer is None or self._forked:
+            self._buffer = np.array(self.cards)
+            self.cards = _read_only(self._buffer)
+            self._forked = False
+        return self._buffer
+
     def reveal_reserved_card(self):
-        self.card_counts[self.reserved_count_card.rank] += 1
+        self._count(self.reserved_count_card.rank)
         self.reserved_count_card = None
 
+    def _count(self, rank: int):
+        self.card_counts[rank] += 1
+        counts = self.running_counts
+        for i, tag in enumerate(self._rank_tags[rank]):
+            counts[i] += tag
+
+    def count(self, system: str = "hi_lo") -> int:
+        return self.running_counts[self._count_index[system]]
+
+    def true_count(self, system: str = "hi_lo") -> float:
+        cards_left_approx = self.shoe_size - self.idx + 1 if self.shoe_size - self.idx + 1 > 0 else 1
+        return self.count(system) / cards_left_approx * 52
+
     def is_active(self) -> bool:
         return self.idx < self.pen_idx
 
+def _read_only(cards: np.ndarray) -> np.ndarray:
+    view = np.asarray(cards, dtype=np.uint8).view()
+    view.flags.writeable = False
+    return view
+
 class Hand:
+    __slots__ = ("cards", "bet", "total", "soft_aces", "pair", "from_split", "split_allowed", "surrendered")
+
     def __init__(self, bet=None):
         self.cards: list[Card] = []
-        self._soft_aces: list[Card] = []
         self.bet: float = bet
+        # Running total with soft aces counted as 11
+        self.total: int = 0
+        # Aces still counted as 11
+        self.soft_aces: int = 0
+        self.pair: bool = False
+        # Game clears split_allowed once the rules allow no more splits
+        self.from_split: bool = False
+        self.split_allowed: bool = True
+        self.surrendered: bool = False
     
     def format(self):
         return ", ".join([str(c) for c in self.cards])
 
     def value(self) -> int:
-        candidate_value = sum([c.value for c in self.cards])
-        if candidate_value <= 21:
-            return candidate_value
-        elif candidate_value > 21 and not self._soft_aces:
-            return -1
-        else:
-            while self._soft_aces:
-                soft_ace = self._soft_aces.pop()
-                soft_ace.value = 1
-                candidate_value -= 10
-                if candidate_value <= 21:
-                    return candidate_value
-            return -1
+        return self.total if self.total <= 21 else -1
     
     def reset_aces(self):
-        self._soft_aces = []
-        for c in self.cards:
-            if c.rank == 0:
-                c.value = 11
-                self._soft_aces.append(c)
+        cards = self.cards
+        self.cards, self.total, self.soft_aces, self.pair = [], 0, 0, False
+        for c in cards:
+            self.hit(c)
     
     def name(self) -> str:
-        if self.is_splittable():
+        if self.pair:
             return f"{self.cards[0].name},{self.cards[0].name}"
         
-        current_value = self.value()
-        if self._soft_aces:
-            if current_value < 12:
-                print(self)
-            second_term = str(current_value - 11) if current_value != 12 else "A"
-            
+        if self.soft_aces:
+            second_term = str(self.total - 11) if self.total != 12 else "A"
             return f"A,{second_term}"
         
-        return f"{current_value}"
+        return f"{self.value()}"
     
+    def state(self) -> int:
+        if self.pair:
+            return PAIR_STATE + self.cards[0].value
+        if self.soft_aces:
+            return SOFT_STATE + self.total
+        return self.total
+
     def is_splittable(self) -> bool:
-        # TODO: implement so that aces can only be split once
-        return len(self.cards) == 2 and self.cards[0].value == self.cards[1].value
+        return self.pair
 
     def is_blackjack(self) -> bool:
-        return len(self.cards) == 2 and self.value() == 21
+        return len(self.cards) == 2 and self.total == 21
 
     def hit(self, card: Card):
         self.cards.append(card)
+        self.total += card.value
         if card.rank == 0:
-            self._soft_aces.append(card)
+            self.soft_aces += 1
+        while self.total > 21 and self.soft_aces:
+            self.total -= 10
+            self.soft_aces -= 1
+        self.pair = self.split_allowed and len(self.cards) == 2 and self.cards[0].value == card.value
+
+    def split(self) -> "Hand":
+        # Moves the second card to a new hand with the same bet
+        new_hand = Hand(bet=self.bet)
+        new_hand.from_split = self.from_split = True
+        new_hand.split_allowed = self.split_allowed
+        new_hand.hit(self.cards.pop())
+        self.reset_aces()
+        return new_hand
 
     def __str__(self):
         return f"Cards: {[str(i) for i in self.cards]}\nValue: {self.value()}"
\ No newline at end of file
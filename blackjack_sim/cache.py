@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from blackjack_sim.rules import Rules
+from blackjack_sim.runner import (
+    SimulationResult,
+    run_simulations,
+)
+from blackjack_sim.tables import ASSETS
+from blackjack_sim.utils import ENGINE_VERSION
+
+META_FILE = "meta.json"
+RESULT_FILE = "result.npz"
+FIELDS = ("balances", "rounds", "hands_played", "round_pnl_sq")
+
+
+class ResultCache:
+    """On-disk cache of per-shoe simulation results, one entry per strategy.
+
+    An entry holds shoes 0 to n of one seed and is keyed by a hash of the
+    strategy, the shoe settings, the rules, the seed, ENGINE_VERSION and the
+    contents of the strategy CSVs, so editing a table or the engine simply
+    misses the old entries. Those are then evicted, least recently used
+    first, once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 1 << 30):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def key(self, factory: Callable, seed: int, rules: Rules = Rules(), **shoe_kwargs) -> str:
+        description = {
+            "strategy": _describe(factory),
+            "seed": seed,
+            "shoe": shoe_kwargs,
+            "rules": asdict(rules),
+            "engine": ENGINE_VERSION,
+            "tables": _tables_digest(factory),
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:32]
+
+    def get(self, key: str) -> SimulationResult | None:
+        entry = self.path / key
+        try:
+            meta = json.loads((entry / META_FILE).read_text())
+            with np.load(entry / RESULT_FILE) as arrays:
+                result = SimulationResult(seed=meta["seed"], **{name: arrays[name] for name in FIELDS})
+        except FileNotFoundError:
+            return None
+        meta["last_used"] = time.time()
+        _write_atomic(entry / META_FILE, json.dumps(meta).encode())
+        return result
+
+    def put(self, key: str, result: SimulationResult, description: str = ""):
+        entry = self.path / key
+        entry.mkdir(exist_ok=True)
+        tmp = entry / f"{RESULT_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **{name: getattr(result, name) for name in FIELDS})
+        os.replace(tmp, entry / RESULT_FILE)
+        meta = {"seed": result.seed, "shoes": [0, result.n_shoes], "strategy": description, "last_used": time.time()}
+        _write_atomic(entry / META_FILE, json.dumps(meta).encode())
+        self.evict()
+
+    def run(
+        self,
+        strategy_factories: list[Callable],
+        n_shoes: int,
+        seed: int,
+        n_decks: int = 6,
+        pen: float = .9,
+        idx: int = 0,
+        rules: Rules = Rules(),
+        **kwargs,
+    ) -> SimulationResult:
+        """Same as `run_simulations`, but only plays the shoes that are not cached yet.
+
+        Strategies with the same number of cached shoes are extended together,
+        so they still share their cards. Keyword arguments such as `workers`
+        go to `run_simulations`; they do not change the results.
+        """
+        shoe_kwargs = dict(n_decks=n_decks, pen=pen, idx=idx)
+        keys = [self.key(f, seed, rules, **shoe_kwargs) for f in strategy_factories]
+        cached = [self.get(key) for key in keys]
+
+        missing_from: dict[int, list[int]] = {}
+        for k, result in enumerate(cached):
+            have = 0 if result is None else result.n_shoes
+            if have < n_shoes:
+                missing_from.setdefault(have, []).append(k)
+
+        for have, ks in missing_from.items():
+            extra = run_simulations(
+                [strategy_factories[k] for k in ks], n_shoes - have, seed=seed, start=have, rules=rules, **shoe_kwargs, **kwargs
+            )
+            for j, k in enumerate(ks):
+                column = SimulationResult(seed, *(getattr(extra, name)[:, [j]] for name in FIELDS))
+                cached[k] = column if cached[k] is None else cached[k].merge(column)
+                self.put(keys[k], cached[k], _describe(strategy_factories[k]))
+
+        return SimulationResult(
+            seed, *(np.concatenate([getattr(r, name)[:n_shoes] for r in cached], axis=1) for name in FIELDS)
+        )
+
+    def size(self) -> int:
+        return sum(f.stat().st_size for f in self.path.glob("*/*") if f.is_file())
+
+    def evict(self):
+        entries = []
+        for meta_file in self.path.glob(f"*/{META_FILE}"):
+            entry = meta_file.parent
+            try:
+                last_used = json.loads(meta_file.read_text())["last_used"]
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            entries.append((last_used, sum(f.stat().st_size for f in entry.iterdir()), entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.path)
+        self.path.mkdir(parents=True)
+
+
+def _describe(factory: Callable) -> str:
+    # Stable across processes: the class path plus any partial keyword arguments
+    kwargs = {}
+    if isinstance(factory, partial):
+        if factory.args:
+            raise ValueError("Cached strategies can only bind keyword arguments.")
+        kwargs = factory.keywords
+        factory = factory.func
+    name = f"{factory.__module__}.{factory.__qualname__}"
+    if "<" in name:
+        raise ValueError(f"Cannot cache results of {name}, use a module level class or function.")
+    return name + json.dumps(kwargs, sort_keys=True, default=_jsonable)
+
+
+def _jsonable(value):
+    # Rules given to a strategy are described by their fields
+    if isinstance(value, Rules):
+        return asdict(value)
+    raise TypeError(f"Cannot describe {value!r} for the cache key.")
+
+
+def _tables_digest(factory: Callable) -> str:
+    # The bundled CSVs, and the strategy's own chart or index file if it was given one
+    files = sorted(ASSETS.glob("*.csv"))
+    if isinstance(factory, partial):
+        files.extend(Path(factory.keywords[k]) for k in ("strategy_file", "index_file") if k in factory.keywords)
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(file.name.encode())
+        digest.update(file.read_bytes())
+    return digest.hexdigest()
+
+
+def _write_atomic(file: Path, data: bytes):
+    tmp = file.with_name(f"{file.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, file)
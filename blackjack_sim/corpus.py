@@ -0,0 +1,128 @@
+import argparse
+import hashlib
+import json
+import os
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+
+from blackjack_sim.base import Shoe
+from blackjack_sim.rng import shoe_orders
+
+# A corpus file is a fixed size header then the rank matrix, one row per shoe
+# in the layout of rng.shoe_orders: the shoe followed by its backup deck, in
+# deal order. The header is MAGIC then JSON padded with spaces, so the body
+# starts page aligned and can be memory mapped as is.
+MAGIC = b"BJSHOES\n"
+HEADER_SIZE = 4096
+FORMAT_VERSION = 1
+# Shoes generated and hashed at a time when writing or verifying
+CHUNK_SHOES = 10_000
+
+
+class ShoeCorpus:
+    """A file of pre-generated shoe orders, read through a read-only memory map.
+
+    Row `i` is shoe `i` of `seed`, the same cards `run_simulations` deals for
+    that seed, so a corpus reproduces a seeded run exactly. Rows are views into
+    the map, never copies, and every process that opens the file shares the
+    page cache. A ShoeCorpus pickles as its path, so workers map the file
+    themselves instead of receiving the shoes.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if not header.startswith(MAGIC):
+            raise ValueError(f"{self.path} is not a shoe corpus.")
+        meta = json.loads(header[len(MAGIC):])
+        if meta["format"] != FORMAT_VERSION:
+            raise ValueError(f"{self.path} has corpus format {meta['format']}, this is {FORMAT_VERSION}.")
+        self.n_decks: int = meta["n_decks"]
+        self.seed: int = meta["seed"]
+        self.checksum: str = meta["checksum"]
+        self.rows: np.ndarray = np.memmap(
+            self.path, dtype=np.uint8, mode="r", offset=HEADER_SIZE, shape=(meta["n_shoes"], 2 * 52 * self.n_decks)
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.rows[index]
+
+    def __reduce__(self):
+        return ShoeCorpus, (self.path,)
+
+    def shoe(self, index: int, **kwargs) -> Shoe:
+        return Shoe.from_corpus(self, index, **kwargs)
+
+    def verify(self):
+        # Reads the whole body, raising ValueError if it does not match the header
+        if _digest(self.rows[i:i + CHUNK_SHOES] for i in range(0, len(self), CHUNK_SHOES)) != self.checksum:
+            raise ValueError(f"{self.path} does not match its checksum.")
+
+
+def write_corpus(path: str | Path, n_shoes: int, seed: int, n_decks: int = 6) -> ShoeCorpus:
+    """Generates shoes 0 to `n_shoes` of `seed` into a corpus file at `path`.
+
+    Shoes are generated and written `CHUNK_SHOES` at a time, so memory does
+    not grow with `n_shoes`. The file is written next to `path` and renamed
+    into place, so readers never see a partial corpus.
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    digest = hashlib.sha256()
+    with open(tmp, "wb") as f:
+        f.write(bytes(HEADER_SIZE))
+        for start in range(0, n_shoes, CHUNK_SHOES):
+            rows = shoe_orders(seed, start, min(start + CHUNK_SHOES, n_shoes), n_decks)
+            digest.update(rows)
+            f.write(rows.tobytes())
+        meta = {
+            "format": FORMAT_VERSION,
+            "n_decks": n_decks,
+            "n_shoes": n_shoes,
+            "seed": seed,
+            "checksum": digest.hexdigest(),
+        }
+        header = MAGIC + json.dumps(meta).encode()
+        if len(header) > HEADER_SIZE:
+            raise ValueError("The corpus header does not fit, use a shorter seed.")
+        f.seek(0)
+        f.write(header.ljust(HEADER_SIZE, b" "))
+    os.replace(tmp, path)
+    return ShoeCorpus(path)
+
+
+@cache
+def open_corpus(path: str | Path) -> ShoeCorpus:
+    # One map per file and process, shared by every batch the process runs
+    return ShoeCorpus(path)
+
+
+def _digest(chunks) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(np.ascontiguousarray(chunk))
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write or verify a file of pre-generated shoes.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--n-shoes", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--n-decks", type=int, default=6)
+    parser.add_argument("--verify", action="store_true", help="check an existing corpus against its checksum")
+    args = parser.parse_args()
+    if args.verify:
+        corpus = ShoeCorpus(args.path)
+        corpus.verify()
+        print(f"{args.path}: {len(corpus)} shoes of {corpus.n_decks} decks from seed {corpus.seed}, checksum ok")
+    else:
+        if args.n_shoes is None or args.seed is None:
+            parser.error("--n-shoes and --seed are needed to write a corpus")
+        write_corpus(args.path, args.n_shoes, args.seed, args.n_decks)
@@ -0,0 +1,14 @@
+# Card counting tags, indexed by Card.rank (A, 2-9, T, J, Q, K)
+COUNT_SYSTEMS: dict[str, tuple[int, ...]] = {
+    "hi_lo": (-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1),
+    "ko": (-1, 1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1),
+    "hi_opt_ii": (0, 1, 1, 2, 2, 1, 1, 0, 0, -2, -2, -2, -2),
+    "omega_ii": (0, 1, 1, 2, 2, 2, 1, 0, -1, -2, -2, -2, -2),
+    "zen": (-1, 1, 1, 2, 2, 2, 1, 0, 0, -2, -2, -2, -2),
+}
+
+def register_count_system(name: str, tags: tuple[int, ...]):
+    tags = tuple(int(t) for t in tags)
+    if len(tags) != 13:
+        raise ValueError(f"Count system {name} needs one tag per rank, got {len(tags)}.")
+    COUNT_SYSTEMS[name] = tags
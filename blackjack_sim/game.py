@@ -1,5 +1,3 @@
-from time import sleep
-
 import numpy as np
 
 from blackjack_sim.base import (
@@ -11,118 +9,207 @@ from blackjack_sim.players import (
     Dealer,
     Player
 )
-from blackjack_sim.utils import estimate_rounds
+from blackjack_sim.instrument import Instrumentation
+from blackjack_sim.observers import (
+    ConsoleObserver,
+    GameObserver,
+)
+from blackjack_sim.roundlog import RoundLog
+from blackjack_sim.rules import (
+    BLACKJACK,
+    LOSS,
+    PUSH,
+    SPLIT_21,
+    SURRENDERED,
+    WIN,
+    Rules,
+)
+from blackjack_sim.stats import OutcomeStats
+
+# Indexed by hand outcome, see Rules.payouts
+OUTCOME_NAMES = ("Loss", "Push", "Win", "Win", "Win", "Surrender")
 
 class Game:
-    def __init__(self, dealer: Dealer, shoe: Shoe, players: list[Player], interactive: bool=False):
+    def __init__(
+        self,
+        dealer: Dealer,
+        shoe: Shoe,
+        players: list[Player],
+        interactive: bool=False,
+        log: RoundLog | None = None,
+        shoe_id: int = 0,
+        instrumentation: Instrumentation | None = None,
+        observer: GameObserver | None = None,
+        stats: OutcomeStats | None = None,
+    ):
         self.dealer: Dealer = dealer
+        # The table's rules are the dealer's, so the two can never disagree
+        self.rules: Rules = dealer.rules
+        self.payouts: tuple[float, ...] = self.rules.payouts
         self.players: list[Player] = players
         self.n_players: int = len(players)
         self.shoe: Shoe = shoe
         self.round: int = 0
-        self.interactive: bool = interactive
-        
-        # 2.7 is average number of cards per blackjack hand
-        round_estimate: int = estimate_rounds(shoe=shoe, n_players=self.n_players)
-        self.player_balances = np.empty((self.n_players, round_estimate))
-        self.player_balances[:] = np.nan
-    
+        self.hands_played: list[int] = [0] * self.n_players
+        # Initial bet of each player in the current round
+        self.bets: list[float] = [0] * self.n_players
+        # Optional per-round record sink, see RoundLog
+        self.log: RoundLog | None = log
+        self.shoe_id: int = shoe_id
+        # Rendering and pacing happen in the observer, rounds without one are headless
+        if interactive and observer is None:
+            observer = ConsoleObserver()
+        self.observer: GameObserver | None = observer
+        if observer is not None:
+            self.play_round = self._play_round_observed
+            for idx, player in enumerate(players):
+                _observe_decisions(observer, idx, player)
+        # Opt-in counters and phase timings, the plain methods run when None
+        self.instrumentation: Instrumentation | None = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self)
+
+        # Per player, updated every round so no per-round history is kept
+        self.start_balances: list[float] = [p.balance for p in players]
+        self.round_pnl_sq: list[float] = [0.] * self.n_players
+        self.peak_balances: list[float] = list(self.start_balances)
+        self.max_drawdown: list[float] = [0.] * self.n_players
+        # Optional summary the finished shoe is added to, see OutcomeStats
+        self.stats: OutcomeStats | None = stats
+
     def play(self):
         # TODO: confirm simulation end condition
         while self.shoe.is_active():
-            self.player_balances[:,self.round] = [p.balance for p in self.players]
-            if self.interactive:
-                print("====================")
-                print(f"Round: {self.round} | PNL: {self.players[0].balance}")
-                print("====================")
-            self.play_round()
-            self.round += 1
-        self.player_balances[:,self.round] = [p.balance for p in self.players]
+            self.step()
+        if self.stats is not None:
+            self.stats.add_shoes(
+                pnl=[p.balance - b for p, b in zip(self.players, self.start_balances)],
+                rounds=[self.round] * self.n_players,
+                hands=self.hands_played,
+                round_pnl_sq=self.round_pnl_sq,
+                max_drawdown=self.max_drawdown,
+            )
+
+    def step(self):
+        # One round with its bookkeeping, see play and session.Session
+        before = [p.balance for p in self.players]
+        if self.log is not None:
+            running_count = self.shoe.running_counts[0]
+            true_count = self.shoe.true_count(self.shoe.count_systems[0])
+        self.play_round()
+        for idx, player in enumerate(self.players):
+            self.hands_played[idx] += len(player.hands)
+            net = player.balance - before[idx]
+            self.round_pnl_sq[idx] += net * net
+            if player.balance > self.peak_balances[idx]:
+                self.peak_balances[idx] = player.balance
+            elif self.peak_balances[idx] - player.balance > self.max_drawdown[idx]:
+                self.max_drawdown[idx] = self.peak_balances[idx] - player.balance
+        if self.log is not None:
+            balances = [p.balance for p in self.players]
+            self.log.append(
+                shoe=self.shoe_id,
+                round=self.round,
+                running_count=running_count,
+                true_count=true_count,
+                bet=self.bets,
+                net=np.subtract(balances, before),
+                balance=balances,
+            )
+        self.round += 1
 
     def play_round(self):
-        # initial deal
+        self._deal_round()
+        self._offer_insurance()
+        if self._dealer_peek():
+            return
+        for player in self.players:
+            handle_player(player, self.shoe, self.rules)
+        handle_dealer(self.dealer, self.shoe)
+        self._settle()
+
+    def _play_round_observed(self):
+        # play_round with events for the observer in between the phases
+        observer = self.observer
+        observer.round_start(self)
+        self._deal_round()
+        observer.dealt(self)
+        if self.dealer.hand.cards[0].rank == 0:
+            observer.insurance_offered(self)
+        self._offer_insurance()
+        if self._dealer_peek():
+            observer.dealer_blackjack(self)
+            return
+        for idx, player in enumerate(self.players):
+            handle_player(player, self.shoe, self.rules)
+            for hand in player.hands:
+                observer.hand_done(idx, hand)
+        handle_dealer(self.dealer, self.shoe)
+        observer.dealer_done(self)
+        dealer_value = self.dealer.hand.value()
+        outcomes = [[hand_outcome(hand, dealer_value) for hand in p.hands] for p in self.players]
+        self._settle()
+        observer.settled(self, outcomes)
+
+    # Phases of a round, in order, see play_round
+    def _deal_round(self):
+        self.shoe.start_round()
         self.dealer.hand = Hand()
         self.dealer.hand.hit(self.shoe.deal())
         self.dealer.hand.hit(self.shoe.deal(reserve_count=True))
         
-        for player in self.players:
+        for idx, player in enumerate(self.players):
             player.hands = [Hand(bet=player.bet())]
+            player.hands[0].split_allowed = self.rules.max_hands > 1
+            self.bets[idx] = player.hands[0].bet
             player.hands[0].hit(self.shoe.deal())
             player.hands[0].hit(self.shoe.deal())
-        
-        if self.interactive:
-            print(f"Dealer: {str(self.dealer.hand.cards[0])}")
 
+    def _offer_insurance(self):
         if self.dealer.hand.cards[0].rank == 0:
+            won = self.rules.insurance_payout if self.dealer.hand.is_blackjack() else -1
             for player in self.players:
-                if self.interactive:
-                    print(self.players[0].hands[0])
                 if player.insurance():
-                    if self.dealer.hand.is_blackjack():
-                        player.balance += player.hands[0].bet / 2
-                    else:
-                        player.balance -= player.hands[0].bet / 2
+                    player.balance += won * player.hands[0].bet / 2
 
-        # anyone home?
+    def _dealer_peek(self) -> bool:
+        # anyone home? Settles the round and returns True if so
         if self.dealer.hand.value() == 21:
-            if self.interactive:
-                print("Sorry! Someone's home")
-                print(f"Dealer: {self.dealer.hand.format()}")
-                print(f"Hand: {self.players[0].hands[0].format()}")
-            
             for player in self.players:
                 if player.hands[0].value() == 21:
-                    player.balance += player.hands[0].bet
+                    player.balance += self.payouts[PUSH] * player.hands[0].bet
             self.shoe.reveal_reserved_card()
-            return
-        
-        # update player hands
-        for idx, player in enumerate(self.players):
-            handle_player(player, self.shoe, interactive=self.interactive and idx == 0)
-        
-        # resolve game
-        handle_dealer(self.dealer, self.shoe)
-        if self.interactive:
-            print(f"Dealer: {', '.join([str(c) for c in self.dealer.hand.cards])}")
-        
-        first_player_results = []
-        if self.dealer.hand.value() == -1:
-            for idx, player in enumerate(self.players):
-                for hand in player.hands:
-                    if hand.is_blackjack():
-                        player.balance += 2.5 * hand.bet
-                        if idx == 0:
-                            first_player_results.append("Win!")
-                    elif hand.value() != -1:
-                        player.balance += 2 * hand.bet
-                        if idx == 0:
-                            first_player_results.append("Win!")
-                    else:
-                        if idx == 0:
-                            first_player_results.append("Loss")
-        else:
-            for idx, player in enumerate(self.players):
-                for hand in player.hands:
-                    if hand.value() > self.dealer.hand.value():
-                        if hand.is_blackjack():
-                            player.balance += 2.5 * hand.bet
-                            if idx == 0:
-                                first_player_results.append("Win")
-                        else:
-                            player.balance += 2 * hand.bet
-                            if idx == 0:
-                                first_player_results.append("Win")
-                    elif hand.value() == self.dealer.hand.value():
-                        player.balance += hand.bet
-                        if idx == 0:
-                            first_player_results.append("Push")
-                    else:
-                        if idx == 0:
-                            first_player_results.append("Loss")
-        
-        if self.interactive:
-            print(first_player_results)
-            sleep(1)
+            return True
+        return False
+
+    def _settle(self):
+        dealer_value = self.dealer.hand.value()
+        payouts = self.payouts
+        for player in self.players:
+            for hand in player.hands:
+                player.balance += payouts[hand_outcome(hand, dealer_value)] * hand.bet
+
+def hand_outcome(hand: Hand, dealer_value: int) -> int:
+    # A busted dealer is worth -1, so every standing hand beats it
+    if hand.surrendered:
+        return SURRENDERED
+    value = hand.value()
+    if value == -1 or value < dealer_value:
+        return LOSS
+    if value == dealer_value:
+        return PUSH
+    if hand.is_blackjack():
+        return SPLIT_21 if hand.from_split else BLACKJACK
+    return WIN
+
+def _observe_decisions(observer: GameObserver, idx: int, player: Player):
+    action = player.action
+
+    def observed_action(hand):
+        observer.decision(idx, hand)
+        return action(hand)
+
+    player.action = observed_action
 
 def handle_dealer(dealer: Dealer, shoe: Shoe):
     shoe.reveal_reserved_card()
@@ -135,13 +222,11 @@ def handle_dealer(dealer: Dealer, shoe: Shoe):
         else:
             raise RuntimeError(f"Invalid dealer action: {str(action)}")
 
-def handle_player(player: Player, shoe: Shoe, interactive=False):
+def handle_player(player: Player, shoe: Shoe, rules: Rules = Rules()):
     hands_to_handle = [player.hands[0]]
     while hands_to_handle:
         hand = hands_to_handle.pop()
         while hand.value() not in (-1, 21):
-            if interactive:
-                print(f"Hand: {hand.format()}")
             action = player.action(hand)
             if action == Action.HIT:
                 hand.hit(shoe.deal())
@@ -151,26 +236,41 @@ def handle_player(player: Player, shoe: Shoe, interactive=False):
                 player.balance -= hand.bet
                 hand.bet *= 2
                 hand.hit(shoe.deal())
-                if interactive:
-                    print(f"Hand: {hand.format()}")
                 break
             elif action == Action.SPLIT:
-                player.balance -= hand.bet
-                new_hand = Hand(bet=hand.bet)
-                new_hand.hit(hand.cards.pop())
-                new_hand.hit(shoe.deal())
-                new_hand.reset_aces()
-                hand.hit(shoe.deal())
-                hand.reset_aces()
-                player.hands.append(new_hand)
+                new_hand = _split(player, shoe, rules, hand)
+                if hand.cards[0].rank == 0 and not rules.hit_split_aces:
+                    _play_split_aces(player, shoe, rules, [new_hand, hand])
+                    break
                 hands_to_handle.append(new_hand)
+            elif action == Action.SURRENDER:
+                if not rules.surrender or len(player.hands) > 1 or len(hand.cards) != 2:
+                    raise RuntimeError("Surrender is only allowed on the first two cards, when the rules offer it.")
+                hand.surrendered = True
+                break
             else:
                 raise RuntimeError(f"Invalid player action: {str(action)}")
-        
-        if interactive and hand.value() == -1:
-            print("Bust!")
-            print(f"Hand: {hand.format()}")
-        if interactive and hand.value() == 21:
-            print(f"Hand: {hand.format()}")
-            print("Blackjack!")
-        
\ No newline at end of file
+
+def _split(player: Player, shoe: Shoe, rules: Rules, hand: Hand) -> Hand:
+    player.balance -= hand.bet
+    new_hand = hand.split()
+    new_hand.hit(shoe.deal())
+    hand.hit(shoe.deal())
+    player.hands.append(new_hand)
+    if len(player.hands) >= rules.max_hands:
+        _stop_splits(player.hands)
+    elif hand.cards[0].rank == 0 and not rules.resplit_aces:
+        _stop_splits((hand, new_hand))
+    return new_hand
+
+def _play_split_aces(player: Player, shoe: Shoe, rules: Rules, hands: list[Hand]):
+    # Split aces get one card each, only a resplit is up to the player, so
+    # they are finished here rather than checked on every decision
+    while hands:
+        hand = hands.pop()
+        if hand.pair and player.action(hand) == Action.SPLIT:
+            hands += [_split(player, shoe, rules, hand), hand]
+
+def _stop_splits(hands):
+    for hand in hands:
+        hand.split_allowed = hand.pair = False
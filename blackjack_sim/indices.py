@@ -0,0 +1,374 @@
+import argparse
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from blackjack_sim.base import SOFT_STATE
+from blackjack_sim.counting import COUNT_SYSTEMS
+from blackjack_sim.probability import (
+    CLASS_VALUES,
+    N_CLASSES,
+    SURRENDER_EV,
+)
+from blackjack_sim.rules import Rules
+from blackjack_sim.solver import full_shoe
+from blackjack_sim.tables import (
+    DHIT,
+    HIT,
+    MORE_CARDS,
+    SPLIT,
+    SPLIT_TWO_CARDS,
+    STANDARD_FILE,
+    STAY,
+    SURRENDER,
+    _parse_hand,
+    standard_table,
+)
+
+VALUES = np.array(CLASS_VALUES)
+# Hi-Lo tag of each card class
+HI_LO = np.array([COUNT_SYSTEMS["hi_lo"][c] for c in range(N_CLASSES)])
+# Cards a hand can use after the player's two cards and the upcard, hole card included
+MAX_CARDS = 36
+CODE_NAMES = {HIT: "H", STAY: "S", DHIT: "D", SPLIT: "P", SURRENDER: "R"}
+
+
+@dataclass(frozen=True)
+class Cell:
+    # `hand` is a total for hard hands, else a name like "A,7" or "T,T"
+    hand: str
+    upcard: int
+    actions: tuple[str, ...]
+
+
+@dataclass
+class CellResult:
+    cell: Cell
+    basic: str
+    # Per true count bucket, from `lowest` up
+    lowest: int
+    n: np.ndarray
+    # Per (action, bucket) sums of the action's result less the basic action's
+    diff: np.ndarray
+    diff_sq: np.ndarray
+
+    def crossover(self, min_samples: int = 100, window: int = 3, z: float = 2) -> tuple[float, str, str] | None:
+        """(index, decision over, decision under) of the deviation closest to a count of zero.
+
+        The gain of each action over the basic one is fit as a straight line
+        in the true count, weighted by the precision of each bucket, and the
+        index is where the line crosses zero. The gain is not linear over the
+        whole range, so the line is refit on the buckets within `window` of
+        the crossing until it settles. A crossing only counts when the slope
+        is `z` standard errors from zero, and the sign of the slope decides
+        which action is taken over the index. None when no action crosses
+        within the buckets.
+        """
+        buckets = self.lowest + np.arange(len(self.n))
+        best = None
+        for a, action in enumerate(self.cell.actions):
+            if action == self.basic:
+                continue
+            enough = self.n >= min_samples
+            index = None
+            near = enough
+            for _ in range(5):
+                if near.sum() < 3:
+                    index = None
+                    break
+                mean = self.diff[a, near] / self.n[near]
+                var = np.maximum(self.diff_sq[a, near] / self.n[near] - mean ** 2, 1e-12)
+                (slope, intercept), cov = np.polyfit(
+                    buckets[near], mean, 1, w=np.sqrt(self.n[near] / var), cov="unscaled"
+                )
+                if abs(slope) <= z * np.sqrt(cov[0, 0]):
+                    index = None
+                    break
+                index = -intercept / slope
+                near = enough & (np.abs(buckets - index) <= window)
+            if index is None or not buckets[enough][0] <= index <= buckets[enough][-1]:
+                continue
+            if best is None or abs(index) < abs(best[0]):
+                over, under = (action, self.basic) if slope > 0 else (self.basic, action)
+                best = (index, over, under)
+        return best
+
+
+def default_cells(rules: Rules = Rules()) -> list[Cell]:
+    """The full deviation matrix: hard 8 to 17, soft 13 to 20 and every pair, against every upcard.
+
+    Doubles are candidates on 8 to 11 and soft hands, surrender on hard 14
+    to 16 when the rules offer it, which covers the Fab 4.
+    """
+    hands = [(str(t), ("H", "S", "D") if t <= 11 else ("H", "S")) for t in range(8, 18)]
+    hands += [(f"A,{v}", ("H", "S", "D")) for v in range(2, 10)]
+    hands += [(f"{v},{v}", ("H", "S", "D", "P")) for v in ["A", "T"] + [str(v) for v in range(9, 1, -1)]]
+    if rules.surrender:
+        hands = [(h, a + ("R",)) if h in ("14", "15", "16") else (h, a) for h, a in hands]
+    return [Cell(hand, u, actions) for hand, actions in hands for u in range(N_CLASSES)]
+
+
+def measure_cell(
+    cell: Cell,
+    n_samples: int,
+    seed: int = 0,
+    rules: Rules = Rules(),
+    pen: float = .9,
+    lowest: int = -10,
+    highest: int = 10,
+    tilt: float = 1.,
+    batch_size: int = 1 << 14,
+    strategy_file: str | Path = STANDARD_FILE,
+) -> CellResult:
+    """Plays the cell's hand against its upcard with every candidate action on the same cards.
+
+    Each sample is a shoe dealt to a random depth before the penetration, the
+    dealt cards drawn with a random tilt toward low or high cards so extreme
+    true counts are common, then the fixed hand and upcard taken from what is
+    left. The true count is the one a strategy sees when deciding, and each
+    action is played on the same cards after it, following the basic strategy
+    chart from the second decision on. Samples where the dealer has blackjack
+    are dropped, as indices apply after the peek.
+    """
+    rng = np.random.default_rng([seed, cell.upcard, *map(ord, cell.hand)])
+    table = standard_table(strategy_file, rules)
+    state = _parse_hand(cell.hand)
+    code = table.actions[state, cell.upcard, 1]
+    basic = CODE_NAMES[code]
+    if basic in ("D", "R") and basic not in cell.actions:
+        basic = CODE_NAMES[table.actions[state, cell.upcard, MORE_CARDS]]
+
+    n_buckets = highest - lowest + 1
+    n = np.zeros(n_buckets)
+    diff = np.zeros((len(cell.actions), n_buckets))
+    diff_sq = np.zeros((len(cell.actions), n_buckets))
+    done = 0
+    while done < n_samples:
+        size = min(batch_size, n_samples - done)
+        hands = _hand_cards(cell.hand, rng, size)
+        cards, true_count, ok = _sample_states(rng, hands, cell.upcard, rules, pen, tilt)
+        results = np.stack([_play(action, hands, cell.upcard, cards, table, rules) for action in cell.actions])
+        # Peeked dealer blackjacks are not part of any decision
+        hole = cards[:, 0]
+        ok &= ~(((cell.upcard == 0) & (hole == 9)) | ((cell.upcard == 9) & (hole == 0)))
+
+        bucket = np.round(true_count).astype(int) - lowest
+        ok &= (bucket >= 0) & (bucket < n_buckets)
+        bucket = bucket[ok]
+        gain = results[:, ok] - results[cell.actions.index(basic), ok]
+        n += np.bincount(bucket, minlength=n_buckets)
+        for a in range(len(cell.actions)):
+            diff[a] += np.bincount(bucket, gain[a], minlength=n_buckets)
+            diff_sq[a] += np.bincount(bucket, gain[a] ** 2, minlength=n_buckets)
+        done += size
+    return CellResult(cell, basic, lowest, n, diff, diff_sq)
+
+
+def _hand_cards(hand: str, rng: np.random.Generator, size: int) -> np.ndarray:
+    # (size, 2) card classes of the player's hand; a hard total is made up of
+    # any two distinct non-ace cards, as often as they are dealt
+    if "," in hand:
+        classes = [0 if name == "A" else 9 if name == "T" else int(name) - 1 for name in hand.split(",")]
+        return np.tile(classes, (size, 1))
+    total = int(hand)
+    pairs, weights = [], []
+    for a in range(1, N_CLASSES):
+        for b in range(a + 1, N_CLASSES):
+            if CLASS_VALUES[a] + CLASS_VALUES[b] == total:
+                pairs.append((a, b))
+                weights.append((4 if a < 9 else 16) * (4 if b < 9 else 16))
+    return np.array(pairs)[rng.choice(len(pairs), size, p=np.array(weights) / sum(weights))]
+
+
+def _sample_states(
+    rng: np.random.Generator, hands: np.ndarray, upcard: int, rules: Rules, pen: float, tilt: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Returns the cards after the player's hand and the upcard, hole card first,
+    # the true count at the decision, and whether the fixed cards were left
+    deck = np.repeat(np.arange(N_CLASSES), full_shoe(rules.n_decks))
+    size, n_cards = len(hands), len(deck)
+    rows = np.arange(size)[:, None]
+    depth = rng.integers(0, min(int(n_cards * pen), n_cards - MAX_CARDS - 3), size)
+
+    # Weighted sampling without replacement by Gumbel top-k: the `depth` cards
+    # with the largest keys are the ones already dealt
+    theta = rng.uniform(-tilt, tilt, size)[:, None]
+    keys = theta * HI_LO[deck] + rng.gumbel(size=(size, n_cards))
+    rank = np.empty((size, n_cards), dtype=int)
+    np.put_along_axis(rank, np.argsort(-keys, axis=1), np.arange(n_cards)[None, :], axis=1)
+    dealt = rank < depth[:, None]
+    count = (HI_LO[deck] * dealt).sum(axis=1)
+
+    # The cards left, in a uniformly random order, then the fixed cards taken out
+    order = np.argsort(np.where(dealt, 2., rng.random((size, n_cards))), axis=1)
+    left = deck[order]
+    taken = np.arange(n_cards) >= (n_cards - depth)[:, None]
+    ok = np.ones(size, dtype=bool)
+    fixed = np.column_stack([hands, np.full(size, upcard)])
+    for j in range(3):
+        # A random one of the matching cards, so the order of the rest stays uniform
+        match = (left == fixed[:, [j]]) & ~taken
+        ok &= match.any(axis=1)
+        taken[rows[:, 0], (match * rng.random((size, n_cards))).argmax(axis=1)] = True
+    cards = np.take_along_axis(left, np.argsort(taken, axis=1, kind="stable"), axis=1)[:, :MAX_CARDS]
+
+    # As Shoe.true_count sees it: four cards out for the round, the hole card not counted
+    count += HI_LO[fixed].sum(axis=1)
+    true_count = count / (n_cards - depth - 4 + 1) * 52
+    return cards, true_count, ok
+
+
+def _add(total: np.ndarray, soft: np.ndarray, card: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # probability._add for arrays, only where `mask`
+    new_total = total + VALUES[card]
+    soft_aces = soft.astype(int) + (card == 0)
+    for _ in range(2):
+        fix = (new_total > 21) & (soft_aces > 0)
+        new_total -= 10 * fix
+        soft_aces -= fix
+    return np.where(mask, new_total, total), np.where(mask, soft_aces > 0, soft)
+
+
+def _play_chart(table, upcard, total, soft, n_cards, bet, cards, ptr):
+    # Plays on by the chart until every hand stands, busts or has doubled. Only
+    # split hands get here with two cards, the table knows whether they can double.
+    rows = np.arange(len(total))
+    active = total < 21
+    while active.any():
+        state = np.where(soft, SOFT_STATE + total, total)
+        code = table.actions[state, upcard, np.where(n_cards == 2, SPLIT_TWO_CARDS, MORE_CARDS)]
+        draws = active & ((code == HIT) | (code == DHIT))
+        bet = np.where(active & (code == DHIT), 2 * bet, bet)
+        total, soft = _add(total, soft, cards[rows, np.minimum(ptr, MAX_CARDS - 1)], draws)
+        ptr = ptr + draws
+        n_cards = n_cards + draws
+        active = draws & (code != DHIT) & (total < 21)
+    return total, bet, ptr
+
+
+def _play(action: str, hands: np.ndarray, upcard: int, cards: np.ndarray, table, rules: Rules) -> np.ndarray:
+    # Result per unit bet of playing `action` first; cards[:, 0] is the hole card
+    size = len(hands)
+    rows = np.arange(size)
+    ptr = np.ones(size, dtype=int)
+    if action == "R":
+        return np.full(size, SURRENDER_EV)
+
+    total, soft = _add(np.zeros(size, dtype=int), np.zeros(size, dtype=bool), hands[:, 0], True)
+    total, soft = _add(total, soft, hands[:, 1], True)
+    bet = np.ones(size)
+    never = np.zeros(size, dtype=bool)
+    if action == "S":
+        player = [(total, bet, never)]
+    elif action == "D":
+        total, _ = _add(total, soft, cards[rows, ptr], True)
+        player = [(total, 2 * bet, never)]
+        ptr = ptr + 1
+    elif action == "H":
+        total, soft = _add(total, soft, cards[rows, ptr], True)
+        total, bet, ptr = _play_chart(table, upcard, total, soft, np.full(size, 3), bet, cards, ptr + 1)
+        player = [(total, bet, never)]
+    else:
+        # Split hands are played on their totals, without resplitting
+        player = []
+        for _ in range(2):
+            total, soft = _add(np.zeros(size, dtype=int), np.zeros(size, dtype=bool), hands[:, 0], True)
+            card = cards[rows, ptr]
+            total, soft = _add(total, soft, card, True)
+            ptr = ptr + 1
+            natural = (total == 21) & rules.split_21_is_blackjack
+            if hands[0, 0] == 0 and not rules.hit_split_aces:
+                hand_bet = bet
+            else:
+                total, hand_bet, ptr = _play_chart(table, upcard, total, soft, np.full(size, 2), bet, cards, ptr)
+            player.append((total, hand_bet, natural))
+
+    # The dealer draws after the player, as Game deals
+    dealer, dealer_soft = _add(np.zeros(size, dtype=int), np.zeros(size, dtype=bool), np.full(size, upcard), True)
+    dealer, dealer_soft = _add(dealer, dealer_soft, cards[:, 0], True)
+    drawing = (dealer < 17) | ((dealer == 17) & dealer_soft & rules.hit_soft_17)
+    while drawing.any():
+        dealer, dealer_soft = _add(dealer, dealer_soft, cards[rows, np.minimum(ptr, MAX_CARDS - 1)], drawing)
+        ptr = ptr + drawing
+        drawing = (dealer < 17) | ((dealer == 17) & dealer_soft & rules.hit_soft_17)
+
+    result = np.zeros(size)
+    for total, hand_bet, natural in player:
+        won = np.where(total > 21, -1, np.where(dealer > 21, 1, np.sign(total - dealer)))
+        # A split natural pushes a dealer 21, as Game settles it
+        won = np.where(natural, np.where(dealer == 21, 0, rules.blackjack_payout), won)
+        result += hand_bet * won
+    return result
+
+
+def generate(cells: list[Cell], n_samples: int, workers: int = 1, **kwargs) -> list[CellResult]:
+    # One process per cell at a time; cells are independent and seeded by their hand and upcard
+    if workers == 1:
+        return [measure_cell(cell, n_samples, **kwargs) for cell in cells]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(measure_cell, cell, n_samples, **kwargs) for cell in cells]
+        return [future.result() for future in futures]
+
+
+def _chart_entry(action: str, other: str) -> str:
+    if action == "D" and other == "S":
+        return "Ds"
+    if action == "R":
+        return "R" + ("s" if other == "S" else "h")
+    return action
+
+
+def write_indices(results: list[CellResult], file: str | Path, min_samples: int = 100):
+    """Writes the crossovers in the i18_strategy.csv format, for I18Strategy(index_file=...).
+
+    Each row covers only the hand it was measured on: hard totals are written
+    as "H16", since a bare total would also cover the soft and pair hands
+    with that value.
+    """
+    rows = []
+    for result in results:
+        found = result.crossover(min_samples)
+        if found is None:
+            continue
+        index, over, under = found
+        # As chart entries: a double against standing stands once doubling is
+        # not allowed, and a surrender falls back to the other decision
+        over, under = (_chart_entry(a, b) for a, b in ((over, under), (under, over)))
+        rows.append({
+            "hand_value": result.cell.hand if "," in result.cell.hand else f"H{result.cell.hand}",
+            # dealer 1 is an ace
+            "dealer": result.cell.upcard + 1,
+            "index": int(np.round(index)),
+            "decision_over": over,
+            "decision_under": under,
+        })
+    with open(file, "w", newline="") as f:
+        writer = csv.DictWriter(f, ["hand_value", "dealer", "index", "decision_over", "decision_under"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find deviation indices by paired simulation of every candidate action.")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--samples", type=int, default=1_000_000, help="per (hand, upcard) cell")
+    parser.add_argument("--hand", action="append", help="only these hands, such as 16 or A,7")
+    parser.add_argument("--n-decks", type=int, default=6)
+    parser.add_argument("--pen", type=float, default=.9)
+    parser.add_argument("--surrender", action="store_true", help="include surrender, for the Fab 4")
+    parser.add_argument("--strategy-file", type=Path, default=STANDARD_FILE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    rules = Rules(n_decks=args.n_decks, surrender=args.surrender)
+    cells = [cell for cell in default_cells(rules) if args.hand is None or cell.hand in args.hand]
+    results = generate(
+        cells, args.samples, args.workers, seed=args.seed, rules=rules, pen=args.pen, strategy_file=args.strategy_file
+    )
+    write_indices(results, args.output)
+    for result in results:
+        if (found := result.crossover()) is not None:
+            print(f"{result.cell.hand:>5} vs {result.cell.upcard + 1:>2}: {found[1]} over {found[0]:+.1f}, else {found[2]}")
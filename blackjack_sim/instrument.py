@@ -0,0 +1,125 @@
+from collections import Counter
+from time import perf_counter
+
+from blackjack_sim.base import Action
+
+PHASES = ("deal", "insurance", "peek", "players", "dealer", "settle")
+
+
+class Instrumentation:
+    """Opt-in counters and per-phase timings for Game rounds.
+
+    `attach` swaps instrumented methods onto one game, its shoe and its
+    players' strategies. Nothing is changed on objects that are not attached,
+    so uninstrumented games run exactly the plain code. One instance can be
+    attached to several games, one after the other, to add up their totals.
+    """
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        # Seconds spent in each phase, handle_player also per seat
+        self.seconds: Counter = Counter()
+
+    def attach(self, game) -> "Instrumentation":
+        if game.observer is not None:
+            raise ValueError("Instrumentation times the headless rounds, the game cannot have an observer.")
+        from blackjack_sim.game import (
+            handle_dealer,
+            handle_player,
+        )
+
+        counters, seconds = self.counters, self.seconds
+
+        def play_round():
+            t = perf_counter()
+            game._deal_round()
+            t = self._lap("deal", t)
+            game._offer_insurance()
+            t = self._lap("insurance", t)
+            peeked = game._dealer_peek()
+            t = self._lap("peek", t)
+            if not peeked:
+                start = t
+                for idx, player in enumerate(game.players):
+                    handle_player(player, game.shoe, game.rules)
+                    t = self._lap(f"player[{idx}]", t)
+                seconds["players"] += t - start
+                handle_dealer(game.dealer, game.shoe)
+                t = self._lap("dealer", t)
+                game._settle()
+                self._lap("settle", t)
+            counters["rounds"] += 1
+            counters["dealer_blackjacks"] += peeked
+            for player in game.players:
+                counters["hands"] += len(player.hands)
+                counters["busts"] += sum(hand.value() == -1 for hand in player.hands)
+
+        game.play_round = play_round
+        self._wrap_shoe(game.shoe)
+        for player in game.players:
+            self._wrap_strategy(player.strategy)
+        return self
+
+    def _lap(self, phase: str, start: float) -> float:
+        now = perf_counter()
+        self.seconds[phase] += now - start
+        return now
+
+    def _wrap_shoe(self, shoe):
+        if "deal" in vars(shoe):
+            return
+        counters = self.counters
+        deal, reveal = shoe.deal, shoe.reveal_reserved_card
+
+        def counted_deal(reserve_count=False):
+            counters["cards"] += 1
+            counters["reserves"] += reserve_count
+            return deal(reserve_count)
+
+        def counted_reveal():
+            counters["reveals"] += 1
+            reveal()
+
+        shoe.deal = counted_deal
+        shoe.reveal_reserved_card = counted_reveal
+
+    def _wrap_strategy(self, strategy):
+        if "action" in vars(strategy):
+            return
+        counters = self.counters
+        action = strategy.action
+
+        def counted_action(hand):
+            counters["lookups"] += 1
+            decision = action(hand)
+            if decision == Action.SPLIT:
+                counters["splits"] += 1
+            elif decision == Action.DHIT:
+                counters["doubles"] += 1
+            return decision
+
+        strategy.action = counted_action
+
+    def merge(self, other: "Instrumentation") -> "Instrumentation":
+        self.counters.update(other.counters)
+        self.seconds.update(other.seconds)
+        return self
+
+    def summary(self) -> dict:
+        rounds = self.counters["rounds"] or 1
+        return {
+            "counters": dict(self.counters),
+            "seconds": dict(self.seconds),
+            "us_per_round": {phase: s / rounds * 1e6 for phase, s in self.seconds.items()},
+        }
+
+    def report(self) -> str:
+        summary = self.summary()
+        total = sum(self.seconds[phase] for phase in PHASES) or 1
+        lines = [f"{'phase':<18} {'us/round':>10} {'share':>7}"]
+        for phase, us in summary["us_per_round"].items():
+            # Seats are part of "players", so they get no share of their own
+            share = f"{self.seconds[phase] / total:>7.1%}" if phase in PHASES else ""
+            lines.append(f"{phase:<18} {us:>10.3f} {share}")
+        lines.extend(f"{name:<18} {n:>10}" for name, n in sorted(self.counters.items()))
+        return "\n".join(lines)
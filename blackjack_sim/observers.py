@@ -0,0 +1,86 @@
+from time import sleep
+
+
+class GameObserver:
+    """Receives the events of an observed Game, see Game(observer=...).
+
+    Every hook does nothing by default, so observers override only what they
+    need. Seats are indexes into game.players.
+    """
+
+    def round_start(self, game):
+        pass
+
+    def dealt(self, game):
+        pass
+
+    def insurance_offered(self, game):
+        pass
+
+    def dealer_blackjack(self, game):
+        pass
+
+    def decision(self, seat: int, hand):
+        # Called before the seat's strategy chooses an action for `hand`
+        pass
+
+    def hand_done(self, seat: int, hand):
+        pass
+
+    def dealer_done(self, game):
+        pass
+
+    def settled(self, game, outcomes: list[list[int]]):
+        # Outcome codes per seat and hand, see Rules.payouts
+        pass
+
+
+class ConsoleObserver(GameObserver):
+    # Prints the first seat's play, pausing `pause` seconds after each round
+    def __init__(self, seat: int = 0, pause: float = 1):
+        self.seat = seat
+        self.pause = pause
+
+    def round_start(self, game):
+        print("====================")
+        print(f"Round: {game.round} | PNL: {game.players[self.seat].balance}")
+        print("====================")
+
+    def dealt(self, game):
+        print(f"Dealer: {str(game.dealer.hand.cards[0])}")
+
+    def insurance_offered(self, game):
+        print(game.players[self.seat].hands[0])
+
+    def dealer_blackjack(self, game):
+        print("Sorry! Someone's home")
+        print(f"Dealer: {game.dealer.hand.format()}")
+        print(f"Hand: {game.players[self.seat].hands[0].format()}")
+
+    def decision(self, seat, hand):
+        if seat == self.seat:
+            print(f"Hand: {hand.format()}")
+
+    def hand_done(self, seat, hand):
+        if seat != self.seat:
+            return
+        print(f"Hand: {hand.format()}")
+        if hand.value() == -1:
+            print("Bust!")
+        elif hand.value() == 21:
+            print("Blackjack!")
+
+    def dealer_done(self, game):
+        print(f"Dealer: {', '.join([str(c) for c in game.dealer.hand.cards])}")
+
+    def settled(self, game, outcomes):
+        from blackjack_sim.game import (
+            LOSS,
+            OUTCOME_NAMES,
+            SURRENDERED,
+        )
+
+        dealer_bust = game.dealer.hand.value() == -1
+        results = [OUTCOME_NAMES[o] + ("!" if dealer_bust and o not in (LOSS, SURRENDERED) else "") for o in outcomes[self.seat]]
+        print(results)
+        sleep(self.pause)
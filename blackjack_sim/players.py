@@ -2,11 +2,14 @@ from blackjack_sim.base import (
     Action,
     Hand,
 )
+from blackjack_sim.rules import Rules
 
 class Dealer:
-    def __init__(self):
+    def __init__(self, rules: Rules = Rules()):
         self.hand: Hand | None = None
-        self.strategy = DealerStrategy()
+        # The table's rules, strategies default to them
+        self.rules: Rules = rules
+        self.strategy = DealerStrategy(rules)
     
     def action(self) -> str:
         return self.strategy.action(self.hand)
@@ -34,8 +37,9 @@ class Player:
             return False
 
 class DealerStrategy:
+    def __init__(self, rules: Rules = Rules()):
+        self.actions = rules.dealer_actions
+
     def action(self, hand) -> Action:
-        if hand.value() >= 17 and not (len(hand.cards) == 2 and hand._soft_aces and hand.value() == 17):
-            return Action.STAY
-        else:
-            return Action.HIT
\ No newline at end of file
+        # Only asked while the hand is 21 or less
+        return self.actions[hand.soft_aces > 0][hand.total]
\ No newline at end of file
@@ -0,0 +1,249 @@
+from functools import (
+    cache,
+    lru_cache,
+)
+from time import perf_counter
+
+import numpy as np
+
+from blackjack_sim.base import (
+    Action,
+    Shoe,
+)
+from blackjack_sim.rules import Rules
+
+# Compositions count the cards left by class: A, 2-9, T
+N_CLASSES = 10
+CLASS_VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+# Card.rank -> class, the same columns as base.UPCARD_INDEX
+RANK_CLASS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9, 9)
+
+# Index of each dealer outcome in the returned probabilities
+OUTCOMES = ("17", "18", "19", "20", "21", "blackjack", "bust")
+BLACKJACK = 5
+BUST = 6
+
+QUERY_CACHE_SIZE = 1 << 14
+EV_CACHE_SIZE = 1 << 12
+# Deeper resplits change a split's value by far less than the rest of the model's error
+MAX_RESPLIT_DEPTH = 3
+DEFAULT_RULES = Rules()
+# Late surrender gives back half the bet
+SURRENDER_EV = -.5
+
+# perf_counter() time after which uncached work raises BudgetExceeded
+_deadline: float | None = None
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def remaining_composition(shoe: Shoe) -> tuple[int, ...]:
+    """Cards a player cannot have seen yet, including the dealer's hole card."""
+    remaining = np.bincount(RANK_CLASS, minlength=N_CLASSES) * 4 * shoe.n_decks
+    seen = np.bincount(RANK_CLASS, weights=shoe.card_counts, minlength=N_CLASSES)
+    return tuple(int(n) for n in remaining - seen)
+
+
+def dealer_probabilities(upcard: int, composition: tuple[int, ...], peeked: bool = False, rules: Rules = DEFAULT_RULES) -> tuple[float, ...]:
+    """Exact distribution of the dealer's final hand, indexed like OUTCOMES.
+
+    `upcard` is a card class (0 for an ace, 9 for a ten) and `composition` the
+    cards the hole card and draws come from, see `remaining_composition`. With
+    `peeked`, the dealer is known not to have blackjack. The dealer stands on
+    17 and hits a soft 17 under `rules.hit_soft_17`.
+    """
+    return _query(upcard, tuple(composition), peeked, rules.hit_soft_17)
+
+
+def action_evs(
+    total: int,
+    soft: bool,
+    can_double: bool,
+    split_class: int | None,
+    upcard: int,
+    composition: tuple[int, ...],
+    deadline: float | None = None,
+    rules: Rules = DEFAULT_RULES,
+    can_surrender: bool = False,
+) -> dict[Action, float]:
+    """Expected return per unit bet of each legal action, after the dealer has peeked.
+
+    The dealer's distribution is exact for `composition`. Later player draws
+    come from the same composition and resplits are approximated, giving every
+    resplit hand the same number of resplits left, the usual simplifications
+    that keep one decision well under a millisecond. Work that
+    is not cached yet raises BudgetExceeded once perf_counter() passes
+    `deadline`; whatever finished stays cached for the next call.
+    """
+    global _deadline
+    _deadline = deadline
+    try:
+        stand, hit, double, split = _player_evs(upcard, tuple(composition), rules)
+    finally:
+        _deadline = None
+
+    evs = {Action.STAY: stand[total], Action.HIT: hit[total, soft]}
+    if can_double:
+        evs[Action.DHIT] = double[total, soft]
+    if split_class is not None:
+        evs[Action.SPLIT] = split[split_class]
+    if can_surrender:
+        evs[Action.SURRENDER] = SURRENDER_EV
+    return evs
+
+
+def cache_info() -> dict:
+    return {"query": _query.cache_info(), "ev": _player_evs.cache_info()}
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _query(upcard: int, composition: tuple[int, ...], peeked: bool, hit_soft_17: bool = True) -> tuple[float, ...]:
+    # Every draw order of a dealer hand has the same probability, a product of
+    # falling factorials of the composition, so one pass over the hand shapes
+    # gives the exact distribution for any composition.
+    drawn, n_drawn, outcome, orders = _dealer_shapes(upcard, hit_soft_17)
+    counts = np.array(composition)
+    n = counts.sum()
+    log_factorial = _log_factorial(n)
+    left = counts - drawn
+    possible = (left >= 0).all(axis=1) & (n_drawn <= n)
+    log_p = (
+        (log_factorial[counts] - log_factorial[np.maximum(left, 0)]).sum(axis=1)
+        - (log_factorial[n] - log_factorial[np.maximum(n - n_drawn, 0)])
+    )
+    p = np.where(possible, orders * np.exp(np.where(possible, log_p, 0)), 0)
+    probs = np.bincount(outcome, weights=p, minlength=len(OUTCOMES))
+    if probs.sum() < 1 - 1e-9:
+        raise ValueError("The composition can run out of cards before the dealer finishes.")
+    if peeked:
+        probs[BLACKJACK] = 0
+    return tuple(probs / probs.sum())
+
+
+# Shared by every query: the dealer hands reachable from an upcard, whatever the composition
+@cache
+def _dealer_shapes(upcard: int, hit_soft_17: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    shapes: dict[tuple[int, ...], list] = {}
+    drawn = [0] * N_CLASSES
+
+    def enumerate_draws(total: int, soft: bool, n_cards: int):
+        if total > 21 or (total >= 17 and not (total == 17 and soft and hit_soft_17)):
+            key = tuple(drawn)
+            if key not in shapes:
+                if total > 21:
+                    outcome = BUST
+                elif total == 21 and n_cards == 2:
+                    outcome = BLACKJACK
+                else:
+                    outcome = total - 17
+                shapes[key] = [outcome, 0]
+            shapes[key][1] += 1
+            return
+        for c in range(N_CLASSES):
+            drawn[c] += 1
+            enumerate_draws(*_add(total, soft, c), n_cards + 1)
+            drawn[c] -= 1
+
+    enumerate_draws(*_add(0, False, upcard), 1)
+    keys = np.array(list(shapes), dtype=int)
+    values = np.array(list(shapes.values()), dtype=int)
+    return keys, keys.sum(axis=1), values[:, 0], values[:, 1]
+
+
+def _log_factorial(n: int) -> np.ndarray:
+    global _LOG_FACTORIAL
+    if len(_LOG_FACTORIAL) <= n:
+        _LOG_FACTORIAL = np.concatenate([[0.], np.cumsum(np.log(np.arange(1, 2 * n + 1)))])
+    return _LOG_FACTORIAL
+
+
+_LOG_FACTORIAL = np.zeros(1)
+
+
+def _check_deadline():
+    if _deadline is not None and perf_counter() > _deadline:
+        raise BudgetExceeded
+
+
+@lru_cache(maxsize=EV_CACHE_SIZE)
+def _player_evs(upcard: int, composition: tuple[int, ...], rules: Rules = DEFAULT_RULES) -> tuple:
+    dealer = _query(upcard, composition, True, rules.hit_soft_17)
+    _check_deadline()
+    n = sum(composition)
+    draws = [(c, k / n) for c, k in enumerate(composition) if k]
+
+    # Standing on 21 or less against a dealer who has no blackjack
+    stand = [-1.] * 32
+    for t in range(4, 22):
+        stand[t] = dealer[BUST] + sum(dealer[d - 17] * ((t > d) - (t < d)) for d in range(17, 22))
+
+    hit, best = {}, {}
+
+    def best_ev(t: int, soft: bool) -> float:
+        if t > 21:
+            return -1.
+        if (t, soft) not in best:
+            after = _AFTER[t, soft]
+            hit[t, soft] = sum(p * best_ev(*after[c]) for c, p in draws)
+            best[t, soft] = max(stand[t], hit[t, soft])
+        return best[t, soft]
+
+    double = {}
+    for t, soft in _AFTER:
+        best_ev(t, soft)
+        after = _AFTER[t, soft]
+        double[t, soft] = 2 * sum(p * stand[after[c][0]] for c, p in draws)
+
+    _check_deadline()
+
+    # One of the two split hands. A split ace and ten can be paid as a natural,
+    # as Game settles it, and resplitting turns the hand into two more.
+    split_natural = rules.blackjack_payout * (1 - dealer[4])
+    resplits = MAX_RESPLIT_DEPTH if rules.max_splits is None else min(rules.max_splits - 1, MAX_RESPLIT_DEPTH)
+    split = []
+    for v in range(N_CLASSES):
+        first = _add(0, False, v)
+
+        def play(c: int) -> float:
+            t, soft = _add(*first, c)
+            if t == 21 and v in (0, 9) and c in (0, 9) and rules.split_21_is_blackjack:
+                return split_natural
+            if v == 0 and not rules.hit_split_aces:
+                return stand[t]
+            if rules.double_after_split:
+                return max(best[t, soft], double[t, soft])
+            return best[t, soft]
+
+        def split_hand(k: int) -> float:
+            can_resplit = k > 0 and (v != 0 or rules.resplit_aces)
+            return sum(
+                p * (max(play(c), 2 * split_hand(k - 1)) if c == v and can_resplit else play(c))
+                for c, p in draws
+            )
+
+        # No split at all without a single split allowed
+        split.append(2 * split_hand(resplits) if resplits >= 0 else -np.inf)
+    return stand, hit, double, split
+
+
+def _add(total: int, soft: bool, c: int) -> tuple[int, bool]:
+    total += CLASS_VALUES[c]
+    soft_aces = soft + (c == 0)
+    while total > 21 and soft_aces:
+        total -= 10
+        soft_aces -= 1
+    # two aces can never both count as 11, so one flag is enough
+    return total, soft_aces > 0
+
+
+def _remove(composition: tuple[int, ...], c: int) -> tuple[int, ...]:
+    return composition[:c] + (composition[c] - 1,) + composition[c + 1:]
+
+
+# Player hand after drawing each class, for every hand a player can act on
+_AFTER = {
+    (t, soft): tuple(_add(t, soft, c) for c in range(N_CLASSES))
+    for t, soft in [(t, False) for t in range(2, 22)] + [(t, True) for t in range(12, 22)]
+}
@@ -0,0 +1,31 @@
+import numpy as np
+
+# Shoe orders come from a counter-based Philox stream keyed by the seed. Shoe
+# `index` owns a fixed block of counters, so it can be generated on its own by
+# jumping straight to its block, and a batch of consecutive shoes is one draw.
+WORDS_PER_COUNTER = 4
+
+
+def shoe_orders(seed: int, start: int, stop: int, n_decks: int = 6) -> np.ndarray:
+    """Rank matrix of shoes `start` to `stop`, one row per shoe in deal order.
+
+    A row is the shoe followed by its backup deck, the same layout as
+    `vector.shoe_ranks`, and is identical however the range is split.
+    """
+    n_cards = 52 * n_decks
+    counters = _counters_per_shoe(n_decks)
+    bit_generator = np.random.Philox(np.random.SeedSequence(seed))
+    bit_generator.advance(start * counters)
+    words = bit_generator.random_raw((stop - start) * counters * WORDS_PER_COUNTER)
+    # Sorting uniform 64 bit keys gives uniform permutations, one per half row
+    keys = words.reshape(stop - start, -1)[:, :2 * n_cards].reshape(stop - start, 2, n_cards)
+    deck = np.tile(np.arange(13, dtype=np.uint8), 4 * n_decks)
+    return deck[np.argsort(keys, axis=-1)].reshape(stop - start, 2 * n_cards)
+
+
+def shoe_order(seed: int, index: int, n_decks: int = 6) -> np.ndarray:
+    return shoe_orders(seed, index, index + 1, n_decks)[0]
+
+
+def _counters_per_shoe(n_decks: int) -> int:
+    return -(-2 * 52 * n_decks // WORDS_PER_COUNTER)
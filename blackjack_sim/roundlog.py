@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA_FILE = "schema.json"
+VERSION = 1
+
+# name -> (dtype, one value per seat)
+COLUMNS = {
+    "shoe": ("<i8", False),
+    "round": ("<i4", False),
+    "running_count": ("<i4", False),
+    "true_count": ("<f8", False),
+    "bet": ("<f8", True),
+    "net": ("<f8", True),
+    "balance": ("<f8", True),
+}
+
+
+class RoundLog:
+    """Append-only, columnar log of per-round results.
+
+    Each column is a raw little-endian file in `path`, described by
+    schema.json, so a finished log can be memory mapped with `RoundLog.read`.
+    Rows are staged in a fixed-size buffer and appended to disk when it fills,
+    so memory use does not grow with the number of rounds. Opening an existing
+    log appends to it.
+    """
+
+    def __init__(self, path: str | Path, n_seats: int, buffer_rows: int = 65536):
+        self.path = Path(path)
+        self.n_seats = n_seats
+        self.buffer_rows = buffer_rows
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        schema_file = self.path / SCHEMA_FILE
+        if schema_file.exists():
+            schema = json.loads(schema_file.read_text())
+            if schema["n_seats"] != n_seats:
+                raise ValueError(f"{self.path} logs {schema['n_seats']} seats, not {n_seats}.")
+        else:
+            schema = {
+                "version": VERSION,
+                "n_seats": n_seats,
+                "columns": {name: dtype for name, (dtype, _) in COLUMNS.items()},
+            }
+            schema_file.write_text(json.dumps(schema, indent=2))
+
+        self._buffers = {
+            name: np.zeros((buffer_rows, n_seats) if per_seat else buffer_rows, dtype=dtype)
+            for name, (dtype, per_seat) in COLUMNS.items()
+        }
+        self._n = 0
+
+    def append(self, shoe: int, round: int, running_count: int, true_count: float, bet, net, balance):
+        i = self._n
+        buffers = self._buffers
+        buffers["shoe"][i] = shoe
+        buffers["round"][i] = round
+        buffers["running_count"][i] = running_count
+        buffers["true_count"][i] = true_count
+        buffers["bet"][i] = bet
+        buffers["net"][i] = net
+        buffers["balance"][i] = balance
+        self._n += 1
+        if self._n == self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._n:
+            return
+        for name, buffer in self._buffers.items():
+            with open(self.path / f"{name}.bin", "ab") as f:
+                f.write(buffer[:self._n].tobytes())
+        self._n = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def read(path: str | Path) -> dict[str, np.ndarray]:
+        # Read-only memory maps, shaped (n_rounds,) or (n_rounds, n_seats)
+        path = Path(path)
+        schema = json.loads((path / SCHEMA_FILE).read_text())
+        n_seats = schema["n_seats"]
+        columns = {}
+        for name, dtype in schema["columns"].items():
+            file = path / f"{name}.bin"
+            per_seat = COLUMNS[name][1]
+            width = np.dtype(dtype).itemsize * (n_seats if per_seat else 1)
+            n_rows = file.stat().st_size // width if file.exists() else 0
+            if not n_rows:
+                columns[name] = np.zeros((0, n_seats) if per_seat else 0, dtype=dtype)
+                continue
+            shape = (n_rows, n_seats) if per_seat else (n_rows,)
+            columns[name] = np.memmap(file, dtype=dtype, mode="r", shape=shape)
+        return columns
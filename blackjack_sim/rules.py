@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+from blackjack_sim.base import Action
+
+# Hand outcomes, indexing Rules.payouts
+LOSS, PUSH, WIN, BLACKJACK, SPLIT_21, SURRENDERED = 0, 1, 2, 3, 4, 5
+
+
+@dataclass(frozen=True)
+class Rules:
+    """Table rules. The defaults are the ones Game plays.
+
+    Frozen, so a Rules can key caches and be shared between processes. The
+    engine reads the rules through the precomputed tables below, so playing a
+    variant costs no more than playing the defaults.
+    """
+
+    n_decks: int = 6
+    # The dealer hits soft 17 (H17) instead of standing (S17)
+    hit_soft_17: bool = True
+    double_after_split: bool = True
+    # Winnings on a natural per unit bet, 1.5 for 3:2 and 1.2 for 6:5
+    blackjack_payout: float = 1.5
+    # Splits allowed in a round, None for no limit
+    max_splits: int | None = None
+    resplit_aces: bool = True
+    hit_split_aces: bool = True
+    # A split ace and ten is paid as a natural
+    split_21_is_blackjack: bool = True
+    # Late surrender, after the dealer has checked for blackjack
+    surrender: bool = False
+    # Winnings per unit insured, insurance costs half the bet
+    insurance_payout: float = 2
+
+    @cached_property
+    def dealer_actions(self) -> tuple[tuple[Action, ...], tuple[Action, ...]]:
+        # Indexed by [soft][total] for totals up to 21
+        return tuple(
+            tuple(Action.HIT if t < 17 or (t == 17 and soft and self.hit_soft_17) else Action.STAY for t in range(22))
+            for soft in (False, True)
+        )
+
+    @cached_property
+    def payouts(self) -> tuple[float, ...]:
+        # What a hand's bet returns at settlement, indexed by outcome
+        natural = 1 + self.blackjack_payout
+        return (0, 1, 2, natural, natural if self.split_21_is_blackjack else 2, .5)
+
+    @cached_property
+    def max_hands(self) -> int:
+        # Hands a player can end a round with, far more than a shoe can deal without a limit
+        return 1 << 16 if self.max_splits is None else self.max_splits + 1
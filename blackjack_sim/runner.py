@@ -0,0 +1,422 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from inspect import signature
+from itertools import islice
+from pathlib import Path
+from statistics import NormalDist
+from time import perf_counter
+from typing import Callable
+
+import numpy as np
+
+from blackjack_sim.base import Shoe
+from blackjack_sim.game import Game
+from blackjack_sim.players import (
+    Dealer,
+    Player,
+)
+from blackjack_sim.rng import shoe_orders
+from blackjack_sim.roundlog import RoundLog
+from blackjack_sim.rules import Rules
+from blackjack_sim.stats import (
+    OutcomeStats,
+    RunningStats,
+)
+
+@dataclass
+class SimulationResult:
+    # All arrays are (n_shoes, n_strategies), rows in shoe index order
+    seed: int
+    balances: np.ndarray
+    rounds: np.ndarray
+    hands_played: np.ndarray
+    # Sum over rounds of squared round PnL, for per-round variance
+    round_pnl_sq: np.ndarray
+
+    @property
+    def n_shoes(self) -> int:
+        return len(self.balances)
+
+    def merge(self, other: "SimulationResult") -> "SimulationResult":
+        if other.seed != self.seed:
+            raise ValueError("Only results from the same seed can be merged.")
+        return SimulationResult(
+            seed=self.seed,
+            balances=np.concatenate([self.balances, other.balances]),
+            rounds=np.concatenate([self.rounds, other.rounds]),
+            hands_played=np.concatenate([self.hands_played, other.hands_played]),
+            round_pnl_sq=np.concatenate([self.round_pnl_sq, other.round_pnl_sq]),
+        )
+
+    def ev_per_round(self) -> np.ndarray:
+        return self.balances.sum(axis=0) / self.rounds.sum(axis=0)
+
+    def round_sd(self) -> np.ndarray:
+        n = self.rounds.sum(axis=0)
+        mean = self.balances.sum(axis=0) / n
+        return np.sqrt(self.round_pnl_sq.sum(axis=0) / n - mean ** 2)
+
+
+def run_simulations(
+    strategy_factories: list[Callable],
+    n_shoes: int,
+    workers: int = 1,
+    seed: int | None = None,
+    batch_size: int | None = None,
+    n_decks: int = 6,
+    pen: float = .9,
+    idx: int = 0,
+    log_dir: str | Path | None = None,
+    start: int = 0,
+    rules: Rules = Rules(),
+    corpus: str | Path | None = None,
+) -> SimulationResult:
+    """Plays `n_shoes` shoes with each strategy factory seated alone at its own table.
+
+    Every factory sees the same cards for a given shoe. Shoe `i` is drawn from
+    its own block of the seed's stream, see rng.shoe_orders, so a seed gives
+    identical results for any `workers` and any shoe can be replayed with
+    `Shoe.from_seed`.
+    Factories are called as `factory(dealer=..., shoe=...)` and must be picklable
+    when `workers > 1`. With `log_dir`, every round is also streamed to a
+    RoundLog per strategy and batch under `log_dir/strategy_<k>/`. The shoes
+    played are `start` to `start + n_shoes`, so a run can be extended later.
+    Every table plays `rules`, which strategies default to. With `corpus`,
+    shoes are read from that corpus file, see corpus.ShoeCorpus, instead of
+    being generated, and the run has the corpus's seed.
+    """
+    if corpus is not None:
+        seed = _check_corpus(corpus, start + n_shoes, n_decks)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    if batch_size is None:
+        batch_size = max(1, -(-n_shoes // (workers * 4)))
+    shoe_kwargs = dict(n_decks=n_decks, pen=pen, idx=idx)
+    stop = start + n_shoes
+    batches = [
+        (strategy_factories, first, min(first + batch_size, stop), seed, shoe_kwargs, log_dir, None, rules, corpus)
+        for first in range(start, stop, batch_size)
+    ]
+
+    if workers == 1:
+        results = [_run_batch(*batch) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_batch, *zip(*batches)))
+
+    result = results[0]
+    for r in results[1:]:
+        result = result.merge(r)
+    return result
+
+
+@dataclass
+class PairedComparison:
+    names: list[str]
+    baseline: int
+    # (n_shoes, n_strategies) final balance minus the baseline's on the same shoe
+    differences: np.ndarray
+    result: SimulationResult
+
+    def mean(self) -> np.ndarray:
+        return self.differences.mean(axis=0)
+
+    def paired_se(self) -> np.ndarray:
+        return self.differences.std(axis=0, ddof=1) / np.sqrt(len(self.differences))
+
+    def unpaired_se(self) -> np.ndarray:
+        # What the standard error would be if each strategy had seen its own shoes
+        var = self.result.balances.var(axis=0, ddof=1)
+        return np.sqrt((var + var[self.baseline]) / len(self.differences))
+
+    def summary(self) -> str:
+        lines = [f"{'strategy':<20} {'diff/shoe':>10} {'paired se':>10} {'unpaired se':>12}"]
+        for k, name in enumerate(self.names):
+            if k != self.baseline:
+                lines.append(f"{name:<20} {self.mean()[k]:>10.4f} {self.paired_se()[k]:>10.4f} {self.unpaired_se()[k]:>12.4f}")
+        return "\n".join(lines)
+
+
+def compare_strategies(strategy_factories: list[Callable], n_shoes: int, baseline: int = 0, **kwargs) -> PairedComparison:
+    """Runs every strategy on identical card sequences and compares each to `baseline`.
+
+    Keyword arguments are passed to `run_simulations`.
+    """
+    result = run_simulations(strategy_factories, n_shoes, **kwargs)
+    return PairedComparison(
+        names=[getattr(f, "__name__", repr(f)) for f in strategy_factories],
+        baseline=baseline,
+        differences=result.balances - result.balances[:, [baseline]],
+        result=result,
+    )
+
+
+@dataclass
+class PrecisionResult:
+    names: list[str]
+    # None when the precision target is on each strategy's own EV
+    baseline: int | None
+    target_se: float
+    # Per shoe PnL, or PnL minus the baseline's on the same shoe
+    stats: RunningStats
+    # Per strategy totals over every shoe played
+    rounds: np.ndarray
+    hands: np.ndarray
+    # Every shoe's results, only kept when asked for, see run_until_precision
+    result: SimulationResult | None
+    elapsed: float
+
+    @property
+    def n_shoes(self) -> int:
+        return self.stats.n
+
+    @property
+    def converged(self) -> bool:
+        return bool((self._tracked(self.se_per_round()) <= self.target_se).all())
+
+    def ev_per_round(self) -> np.ndarray:
+        return self.stats.mean / self._mean_rounds()
+
+    def se_per_round(self) -> np.ndarray:
+        # Rounds per shoe barely vary, so they are treated as a constant scale
+        return self.stats.se() / self._mean_rounds()
+
+    def hands_per_second(self) -> float:
+        return self.hands.sum() / self.elapsed
+
+    def _mean_rounds(self) -> np.ndarray:
+        return self.rounds / self.n_shoes
+
+    def _tracked(self, values: np.ndarray) -> np.ndarray:
+        if self.baseline is None:
+            return values
+        return np.delete(values, self.baseline)
+
+    def summary(self) -> str:
+        label = "ev/round" if self.baseline is None else "diff/round"
+        lines = [
+            f"{self.n_shoes} shoes, {self.hands.sum()} hands in {self.elapsed:.1f}s "
+            f"({self.hands_per_second():,.0f} hands/s), target se {self.target_se:.5f} "
+            f"{'met' if self.converged else 'NOT met'}",
+            f"{'strategy':<20} {label:>10} {'se':>10}",
+        ]
+        for k, name in enumerate(self.names):
+            if k != self.baseline:
+                lines.append(f"{name:<20} {self.ev_per_round()[k]:>10.5f} {self.se_per_round()[k]:>10.5f}")
+        return "\n".join(lines)
+
+
+def run_until_precision(
+    strategy_factories: list[Callable],
+    target_se: float | None = None,
+    ci_width: float | None = None,
+    confidence: float = .95,
+    baseline: int | None = None,
+    min_shoes: int = 100,
+    max_shoes: int = 1_000_000,
+    workers: int = 1,
+    seed: int | None = None,
+    batch_size: int = 100,
+    n_decks: int = 6,
+    pen: float = .9,
+    idx: int = 0,
+    rules: Rules = Rules(),
+    keep_result: bool = False,
+) -> PrecisionResult:
+    """Plays shoes until the EV per round of every strategy is known to `target_se`.
+
+    Alternatively `ci_width` is the full width of the `confidence` interval.
+    With `baseline`, the target is on each strategy's paired difference to the
+    baseline instead. Batches are merged into the running statistics in shoe
+    order and the target is checked after each one, so for a seed and
+    `batch_size` the shoes played do not depend on `workers`. Stops at
+    `max_shoes` even when the target is not met. Only running totals are
+    kept, so memory does not grow with the shoes played; with `keep_result`
+    every shoe's results are also gathered into `result`.
+    """
+    if (target_se is None) == (ci_width is None):
+        raise ValueError("Give exactly one of target_se and ci_width.")
+    if target_se is None:
+        target_se = ci_width / (2 * NormalDist().inv_cdf((1 + confidence) / 2))
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    shoe_kwargs = dict(n_decks=n_decks, pen=pen, idx=idx)
+    batches = (
+        (strategy_factories, start, min(start + batch_size, max_shoes), seed, shoe_kwargs, None, None, rules)
+        for start in range(0, max_shoes, batch_size)
+    )
+
+    start_time = perf_counter()
+    precision = PrecisionResult(
+        names=[getattr(f, "__name__", repr(f)) for f in strategy_factories],
+        baseline=baseline,
+        target_se=target_se,
+        stats=RunningStats(len(strategy_factories)),
+        rounds=np.zeros(len(strategy_factories), dtype=int),
+        hands=np.zeros(len(strategy_factories), dtype=int),
+        result=None,
+        elapsed=0.,
+    )
+
+    results = []
+
+    def add(batch: SimulationResult):
+        pnl = batch.balances
+        if baseline is not None:
+            pnl = pnl - pnl[:, [baseline]]
+        precision.stats.add_batch(pnl)
+        precision.rounds += batch.rounds.sum(axis=0)
+        precision.hands += batch.hands_played.sum(axis=0)
+        if keep_result:
+            results.append(batch)
+        return precision.n_shoes >= min_shoes and precision.converged
+
+    if workers == 1:
+        for batch in batches:
+            if add(_run_batch(*batch)):
+                break
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep every worker busy, but merge strictly in submission order
+            pending = deque(pool.submit(_run_batch, *batch) for batch in islice(batches, 2 * workers))
+            while pending:
+                if add(pending.popleft().result()):
+                    for future in pending:
+                        future.cancel()
+                    break
+                batch = next(batches, None)
+                if batch is not None:
+                    pending.append(pool.submit(_run_batch, *batch))
+
+    precision.elapsed = perf_counter() - start_time
+    if results:
+        precision.result = SimulationResult(
+            seed=seed,
+            balances=np.concatenate([r.balances for r in results]),
+            rounds=np.concatenate([r.rounds for r in results]),
+            hands_played=np.concatenate([r.hands_played for r in results]),
+            round_pnl_sq=np.concatenate([r.round_pnl_sq for r in results]),
+        )
+    return precision
+
+
+def summarize_simulations(
+    strategy_factories: list[Callable],
+    n_shoes: int,
+    workers: int = 1,
+    seed: int | None = None,
+    batch_size: int = 1000,
+    n_decks: int = 6,
+    pen: float = .9,
+    idx: int = 0,
+    start: int = 0,
+    rules: Rules = Rules(),
+    corpus: str | Path | None = None,
+    **stats_kwargs,
+) -> list[OutcomeStats]:
+    """Plays the same shoes as `run_simulations`, keeping only an OutcomeStats per strategy.
+
+    Nothing is kept per shoe, so memory does not grow with `n_shoes`; each
+    batch is summarised where it is played and the summaries are merged.
+    Keyword arguments such as `edges` go to OutcomeStats.
+    """
+    if corpus is not None:
+        seed = _check_corpus(corpus, start + n_shoes, n_decks)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    shoe_kwargs = dict(n_decks=n_decks, pen=pen, idx=idx)
+    stop = start + n_shoes
+    batches = [
+        (strategy_factories, first, min(first + batch_size, stop), seed, shoe_kwargs, stats_kwargs, rules, corpus)
+        for first in range(start, stop, batch_size)
+    ]
+    stats = [OutcomeStats(**stats_kwargs) for _ in strategy_factories]
+
+    def merge(summaries):
+        for summary in summaries:
+            for total, part in zip(stats, summary):
+                total.merge(part)
+
+    if workers == 1:
+        merge(map(_summarize_batch, *zip(*batches)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            merge(pool.map(_summarize_batch, *zip(*batches)))
+    return stats
+
+
+def _summarize_batch(strategy_factories, start, stop, seed, shoe_kwargs, stats_kwargs, rules, corpus) -> list[OutcomeStats]:
+    stats = [OutcomeStats(**stats_kwargs) for _ in strategy_factories]
+    _run_batch(strategy_factories, start, stop, seed, shoe_kwargs, stats=stats, rules=rules, corpus=corpus)
+    return stats
+
+
+def _check_corpus(path: str | Path, stop: int, n_decks: int) -> int:
+    # Imported here so `python -m blackjack_sim.corpus` does not find it loaded already
+    from blackjack_sim.corpus import open_corpus
+
+    corpus = open_corpus(path)
+    if corpus.n_decks != n_decks:
+        raise ValueError(f"{path} holds {corpus.n_decks} deck shoes, not {n_decks}.")
+    if len(corpus) < stop:
+        raise ValueError(f"{path} holds {len(corpus)} shoes, {stop} are needed.")
+    return corpus.seed
+
+
+def _count_systems(strategy_factories) -> tuple[str, ...]:
+    # Every system a factory counts with, Hi-Lo first as RoundLog records it;
+    # a partial's keywords show up as its signature's defaults
+    systems = {"hi_lo": None}
+    for factory in strategy_factories:
+        param = signature(factory).parameters.get("count_system")
+        if param is not None and param.default is not param.empty:
+            systems[param.default] = None
+    return tuple(systems)
+
+
+def _run_batch(strategy_factories, start, stop, seed, shoe_kwargs, log_dir=None, stats=None, rules=Rules(), corpus=None) -> SimulationResult:
+    shape = (stop - start, len(strategy_factories))
+    logs = [
+        RoundLog(Path(log_dir) / f"strategy_{k}" / f"shoes_{start:09d}", n_seats=1) if log_dir is not None else None
+        for k in range(len(strategy_factories))
+    ]
+    balances = np.zeros(shape)
+    rounds = np.zeros(shape, dtype=int)
+    hands_played = np.zeros(shape, dtype=int)
+    round_pnl_sq = np.zeros(shape)
+    if corpus is None:
+        orders = shoe_orders(seed, start, stop, shoe_kwargs.get("n_decks", 6))
+    else:
+        from blackjack_sim.corpus import open_corpus
+
+        # Views of the shared map, each worker opens the file once
+        orders = open_corpus(corpus).rows[start:stop]
+    count_systems = _count_systems(strategy_factories)
+    for i in range(start, stop):
+        order = Shoe.from_deal_order(orders[i - start], count_systems=count_systems, **shoe_kwargs)
+        for k, factory in enumerate(strategy_factories):
+            # Every factory deals from its own cursor over the same cards
+            shoe = order.fork()
+            dealer = Dealer(rules)
+            player = Player(strategy=factory(dealer=dealer, shoe=shoe))
+            game = Game(
+                dealer=dealer, shoe=shoe, players=[player], log=logs[k], shoe_id=i,
+                stats=stats[k] if stats is not None else None,
+            )
+            game.play()
+
+            balances[i - start, k] = player.balance
+            rounds[i - start, k] = game.round
+            hands_played[i - start, k] = game.hands_played[0]
+            round_pnl_sq[i - start, k] = game.round_pnl_sq[0]
+    for log in logs:
+        if log is not None:
+            log.close()
+    return SimulationResult(
+        seed=seed,
+        balances=balances,
+        rounds=rounds,
+        hands_played=hands_played,
+        round_pnl_sq=round_pnl_sq,
+    )
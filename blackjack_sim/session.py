@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from blackjack_sim.base import Shoe
+from blackjack_sim.game import Game
+from blackjack_sim.players import (
+    Dealer,
+    Player,
+)
+from blackjack_sim.rules import Rules
+
+
+@dataclass
+class SessionResult:
+    # Arrays are per seat
+    rounds: int
+    # Shoes dealt, always 1 with a continuous shuffling machine
+    shoes: int
+    bankroll: np.ndarray
+    final: np.ndarray
+    hands_played: np.ndarray
+    round_pnl_sq: np.ndarray
+    max_drawdown: np.ndarray
+    # Rounds played when the seat's balance first reached zero, -1 if never
+    ruin_round: np.ndarray
+
+    @property
+    def pnl(self) -> np.ndarray:
+        return self.final - self.bankroll
+
+    def ev_per_round(self) -> np.ndarray:
+        return self.pnl / self.rounds
+
+    def hours(self, rounds_per_hour: float = 100) -> float:
+        return self.rounds / rounds_per_hour
+
+
+class Session:
+    """Plays consecutive shoes at one table, the way a player sits through them.
+
+    The shoe, dealer, players and game are created once: at the cut card the
+    same card buffer is shuffled in place and the counts start over, and a
+    shoe that runs out mid-round shuffles its discards back in rather than
+    dealing from a second deck. Balances carry over from shoe to shoe,
+    starting at `bankroll`. With `csm`, a continuous shuffling machine takes
+    the cards back after every round, so every round is dealt off the top
+    of a freshly shuffled shoe and there is no cut card.
+    """
+
+    def __init__(
+        self,
+        strategy_factories: list[Callable],
+        bankroll: float = 0,
+        n_decks: int = 6,
+        pen: float = .9,
+        csm: bool = False,
+        rng: np.random.Generator | None = None,
+        rules: Rules = Rules(),
+    ):
+        self.shoe = Shoe(n_decks=n_decks, pen=pen, rng=rng, reshuffle_discards=True)
+        self.dealer = Dealer(rules)
+        self.players = [Player(strategy=factory(dealer=self.dealer, shoe=self.shoe)) for factory in strategy_factories]
+        for player in self.players:
+            player.balance = bankroll
+        self.game = Game(dealer=self.dealer, shoe=self.shoe, players=self.players)
+        self.bankroll = bankroll
+        self.csm = csm
+        self.shoes = 1
+        self.ruin_round = [-1] * len(self.players)
+
+    def play(self, n_rounds: int, stop_at_ruin: bool = False) -> SessionResult:
+        # With `stop_at_ruin`, the session ends once any seat has lost its bankroll
+        game, shoe = self.game, self.shoe
+        for _ in range(n_rounds):
+            if self.csm:
+                shoe.reshuffle()
+            elif not shoe.is_active():
+                shoe.reshuffle()
+                self.shoes += 1
+            game.step()
+            if self.bankroll > 0 and self._check_ruin() and stop_at_ruin:
+                break
+        return self.result()
+
+    def _check_ruin(self) -> bool:
+        ruined = False
+        for idx, player in enumerate(self.players):
+            if self.ruin_round[idx] < 0 and player.balance <= 0:
+                self.ruin_round[idx] = self.game.round
+            ruined |= self.ruin_round[idx] >= 0
+        return ruined
+
+    def result(self) -> SessionResult:
+        game = self.game
+        return SessionResult(
+            rounds=game.round,
+            shoes=self.shoes,
+            bankroll=np.full(len(self.players), self.bankroll, dtype=float),
+            final=np.array([p.balance for p in self.players], dtype=float),
+            hands_played=np.array(game.hands_played),
+            round_pnl_sq=np.array(game.round_pnl_sq),
+            max_drawdown=np.array(game.max_drawdown),
+            ruin_round=np.array(self.ruin_round),
+        )
+
+
+def run_sessions(
+    strategy_factories: list[Callable],
+    n_sessions: int,
+    n_rounds: int,
+    workers: int = 1,
+    seed: int | None = None,
+    **session_kwargs,
+) -> list[SessionResult]:
+    """Plays `n_sessions` independent sessions of `n_rounds` rounds, one result each.
+
+    Session `i` shuffles from its own generator, keyed by the seed and `i`,
+    so a seed gives the same sessions for any `workers`. Keyword arguments
+    go to Session and `play`.
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    args = [(strategy_factories, n_rounds, seed, i, session_kwargs) for i in range(n_sessions)]
+    if workers == 1:
+        return [_run_session(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_session, *zip(*args)))
+
+
+def _run_session(strategy_factories, n_rounds, seed, index, session_kwargs) -> SessionResult:
+    session_kwargs = dict(session_kwargs)
+    stop_at_ruin = session_kwargs.pop("stop_at_ruin", False)
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    return Session(strategy_factories, rng=rng, **session_kwargs).play(n_rounds, stop_at_ruin)
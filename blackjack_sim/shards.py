@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from blackjack_sim import strategy as strategies
+from blackjack_sim.runner import _run_batch
+from blackjack_sim.stats import Histogram
+from blackjack_sim.utils import ENGINE_VERSION
+
+# A job is a directory shared by every machine taking part:
+#   job.json              the spec written by `plan`
+#   claims/<shard>        created with O_EXCL by the worker running the shard
+#   shards/<shard>.<who>.npz   the shard's aggregates, renamed into place when done
+JOB_FILE = "job.json"
+# Sums in the aggregates, one value per strategy
+SUMS = ("shoes", "rounds", "hands", "pnl", "pnl_sq", "round_pnl_sq")
+
+
+def plan(
+    job_dir: str | Path,
+    strategies: list[dict],
+    n_shoes: int,
+    shard_size: int,
+    seed: int,
+    n_decks: int = 6,
+    pen: float = .9,
+    idx: int = 0,
+    histogram_edges: list[float] | None = None,
+) -> dict:
+    """Writes the job spec splitting shoes 0 to `n_shoes` of `seed` into shards.
+
+    Strategies are `{"name": <class in blackjack_sim.strategy>, "kwargs": {...}}`.
+    Shoe PnL is histogrammed on `histogram_edges`, by default unit bins from -100 to 100.
+    """
+    job_dir = Path(job_dir)
+    job_dir.mkdir(parents=True, exist_ok=True)
+    job = {
+        "engine": ENGINE_VERSION,
+        "seed": seed,
+        "strategies": strategies,
+        "shoe": {"n_decks": n_decks, "pen": pen, "idx": idx},
+        "shards": [[start, min(start + shard_size, n_shoes)] for start in range(0, n_shoes, shard_size)],
+        "histogram_edges": histogram_edges if histogram_edges is not None else list(range(-100, 101)),
+    }
+    job_file = job_dir / JOB_FILE
+    if job_file.exists() and json.loads(job_file.read_text()) != job:
+        raise ValueError(f"{job_dir} already holds a different job.")
+    job_file.write_text(json.dumps(job, indent=2))
+    return job
+
+
+def work(job_dir: str | Path, max_shards: int | None = None, stale_after: float | None = None) -> int:
+    """Runs unclaimed shards until none are left, returning how many this worker ran.
+
+    With `stale_after`, a claim older than that many seconds whose shard never
+    finished is taken over, for workers that died.
+    """
+    job_dir = Path(job_dir)
+    job = _load_job(job_dir)
+    (job_dir / "claims").mkdir(exist_ok=True)
+    (job_dir / "shards").mkdir(exist_ok=True)
+    factories = [partial(getattr(strategies, s["name"]), **s.get("kwargs", {})) for s in job["strategies"]]
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+
+    ran = 0
+    for shard, (start, stop) in enumerate(job["shards"]):
+        if max_shards is not None and ran >= max_shards:
+            break
+        if not _claim(job_dir, shard, worker, stale_after):
+            continue
+        result = _run_batch(factories, start, stop, job["seed"], job["shoe"])
+        pnl = result.balances
+        histogram = Histogram(job["histogram_edges"], (len(factories),))
+        histogram.add_batch(pnl)
+        out = job_dir / "shards" / f"{shard:06d}.{worker}.npz"
+        tmp = out.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                shard=shard,
+                start=start,
+                stop=stop,
+                engine=job["engine"],
+                shoes=np.full(len(factories), stop - start),
+                rounds=result.rounds.sum(axis=0),
+                hands=result.hands_played.sum(axis=0),
+                pnl=pnl.sum(axis=0),
+                pnl_sq=(pnl ** 2).sum(axis=0),
+                round_pnl_sq=result.round_pnl_sq.sum(axis=0),
+                histogram=histogram.counts,
+            )
+        os.replace(tmp, out)
+        ran += 1
+    return ran
+
+
+def merge(job_dir: str | Path) -> dict:
+    """Adds up every shard's aggregates, after checking each shard is there exactly once.
+
+    Bets are whole units and every payout a multiple of half a bet, so the
+    sums are exact in floating point and the merge does not depend on order.
+    A shard found twice, say after a stale claim was taken over, is only
+    counted once and only if both copies agree.
+    """
+    job_dir = Path(job_dir)
+    job = _load_job(job_dir)
+    found: dict[int, list[Path]] = {}
+    for file in sorted((job_dir / "shards").glob("*.npz")):
+        found.setdefault(int(file.name.split(".")[0]), []).append(file)
+
+    missing = [shard for shard in range(len(job["shards"])) if shard not in found]
+    if missing:
+        raise ValueError(f"Missing shards: {missing}")
+    unknown = [shard for shard in found if shard >= len(job["shards"])]
+    if unknown:
+        raise ValueError(f"Shards not in the job: {unknown}")
+
+    n = len(job["strategies"])
+    totals = {name: np.zeros(n) for name in SUMS}
+    histogram = Histogram(job["histogram_edges"], (n,))
+    duplicates = []
+    for shard, files in sorted(found.items()):
+        copies = [dict(np.load(file)) for file in files]
+        first = copies[0]
+        for other in copies[1:]:
+            if any(not np.array_equal(first[k], other[k]) for k in first):
+                raise ValueError(f"Copies of shard {shard} disagree: {[f.name for f in files]}")
+        if len(copies) > 1:
+            duplicates.append(shard)
+        if [int(first["start"]), int(first["stop"])] != job["shards"][shard] or int(first["engine"]) != job["engine"]:
+            raise ValueError(f"Shard {shard} was run for a different job: {files[0].name}")
+        for name in SUMS:
+            totals[name] += first[name]
+        histogram.counts += first["histogram"]
+
+    rounds = totals["rounds"]
+    shoes = totals["shoes"]
+    shoe_var = (totals["pnl_sq"] - totals["pnl"] ** 2 / shoes) / (shoes - 1)
+    return {
+        "strategies": job["strategies"],
+        "duplicates": duplicates,
+        **{name: values.tolist() for name, values in totals.items()},
+        "ev_per_round": (totals["pnl"] / rounds).tolist(),
+        "se_per_round": (np.sqrt(shoe_var / shoes) / (rounds / shoes)).tolist(),
+        "sd_per_round": np.sqrt(totals["round_pnl_sq"] / rounds - (totals["pnl"] / rounds) ** 2).tolist(),
+        "histogram_edges": job["histogram_edges"],
+        "histogram": histogram.counts.tolist(),
+    }
+
+
+def _load_job(job_dir: Path) -> dict:
+    job = json.loads((job_dir / JOB_FILE).read_text())
+    if job["engine"] != ENGINE_VERSION:
+        raise ValueError(f"The job was planned for engine version {job['engine']}, this is {ENGINE_VERSION}.")
+    return job
+
+
+def _claim(job_dir: Path, shard: int, worker: str, stale_after: float | None) -> bool:
+    claim = job_dir / "claims" / f"{shard:06d}"
+    try:
+        fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        if stale_after is None or any((job_dir / "shards").glob(f"{shard:06d}.*.npz")):
+            return False
+        if time.time() - claim.stat().st_mtime < stale_after:
+            return False
+        # Whoever removes the stale claim first gets to recreate it
+        try:
+            os.rename(claim, claim.with_suffix(f".stale.{worker}"))
+        except FileNotFoundError:
+            return False
+        return _claim(job_dir, shard, worker, None)
+    with os.fdopen(fd, "w") as f:
+        f.write(worker)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one seeded simulation as shards over a shared directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="write the job spec")
+    plan_parser.add_argument("job_dir", type=Path)
+    plan_parser.add_argument("--strategy", action="append", required=True, help='name, or JSON like {"name": "I18Strategy", "kwargs": {"max_bet": 8}}')
+    plan_parser.add_argument("--n-shoes", type=int, required=True)
+    plan_parser.add_argument("--shard-size", type=int, default=1000)
+    plan_parser.add_argument("--seed", type=int, required=True)
+    plan_parser.add_argument("--n-decks", type=int, default=6)
+    plan_parser.add_argument("--pen", type=float, default=.9)
+    plan_parser.add_argument("--idx", type=int, default=0)
+
+    work_parser = commands.add_parser("work", help="run unclaimed shards")
+    work_parser.add_argument("job_dir", type=Path)
+    work_parser.add_argument("--max-shards", type=int)
+    work_parser.add_argument("--stale-after", type=float, help="take over claims older than this many seconds")
+
+    merge_parser = commands.add_parser("merge", help="combine finished shards")
+    merge_parser.add_argument("job_dir", type=Path)
+    merge_parser.add_argument("--output", type=Path)
+
+    args = parser.parse_args()
+    if args.command == "plan":
+        specs = [json.loads(s) if s.startswith("{") else {"name": s} for s in args.strategy]
+        job = plan(args.job_dir, specs, args.n_shoes, args.shard_size, args.seed, args.n_decks, args.pen, args.idx)
+        print(f"{len(job['shards'])} shards")
+    elif args.command == "work":
+        print(f"ran {work(args.job_dir, args.max_shards, args.stale_after)} shards")
+    else:
+        try:
+            merged = merge(args.job_dir)
+        except ValueError as e:
+            sys.exit(str(e))
+        if merged["duplicates"]:
+            print(f"Counted once, shards run more than once: {merged['duplicates']}")
+        for spec, ev, se, shoes in zip(merged["strategies"], merged["ev_per_round"], merged["se_per_round"], merged["shoes"]):
+            print(f"{spec['name']:<20} {int(shoes)} shoes  ev/round {ev:.5f} +- {se:.5f}")
+        if args.output:
+            args.output.write_text(json.dumps(merged, indent=2))
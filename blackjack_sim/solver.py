@@ -0,0 +1,112 @@
+import argparse
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from blackjack_sim.probability import (
+    N_CLASSES,
+    SURRENDER_EV,
+    _player_evs,
+    _remove,
+)
+from blackjack_sim.rules import Rules
+from blackjack_sim.tables import DEALER_CARD_NAMES
+
+# Rows of standard_strategy.csv as (category, hand name, total, soft), pairs with
+# the card class instead of whether the total is soft
+PAIR_ROWS = [("Pair Splitting", "A,A", 12, 0), ("Pair Splitting", "T,T", 20, 9)] + [
+    ("Pair Splitting", f"{v},{v}", 2 * v, v - 1) for v in range(9, 1, -1)
+]
+SOFT_ROWS = [("Soft Totals", f"A,{v}", 11 + v, True) for v in range(10, 1, -1)]
+HARD_ROWS = [("Hard Totals", str(t), t, False) for t in range(21, 2, -1)]
+# Chart columns run 2 to 10 then the ace, as card classes
+UPCARDS = list(range(1, N_CLASSES)) + [0]
+COLUMNS = [DEALER_CARD_NAMES[u] for u in UPCARDS]
+
+
+def full_shoe(n_decks: int) -> tuple[int, ...]:
+    return tuple(4 * n_decks if c < 9 else 16 * n_decks for c in range(N_CLASSES))
+
+
+def solve_upcard(upcard: int, rules: Rules = Rules()) -> dict[str, str]:
+    """Chart entries for every row against one upcard, keyed by hand name.
+
+    The strategy is total dependent: every decision is made on the full shoe
+    less the upcard, after the dealer has peeked. The hand values come from
+    the memoized hand state recursion in probability.py.
+    """
+    stand, hit, double, split = _player_evs(upcard, _remove(full_shoe(rules.n_decks), upcard), rules)
+    entries = {}
+    for _, name, total, soft in SOFT_ROWS + HARD_ROWS:
+        entries[name] = _entry(stand[total], hit[total, soft], double[total, soft], rules)
+
+    for _, name, total, c in PAIR_ROWS:
+        soft = c == 0
+        played = max(stand[total], hit[total, soft], double[total, soft])
+        if split[c] <= played:
+            entries[name] = "N"
+        elif rules.surrender and SURRENDER_EV > split[c]:
+            entries[name] = "Rp"
+        else:
+            entries[name] = "Y"
+    return entries
+
+
+def _entry(stand: float, hit: float, double: float, rules: Rules) -> str:
+    fallback = "H" if hit > stand else "S"
+    if rules.surrender and SURRENDER_EV > max(stand, hit, double):
+        return "R" + fallback.lower()
+    if double > max(stand, hit):
+        return "D" if fallback == "H" else "Ds"
+    return fallback
+
+
+def solve(rules: Rules = Rules(), workers: int = 1) -> list[dict[str, str]]:
+    """Basic strategy chart for `rules`, one row per line of standard_strategy.csv.
+
+    Upcards are solved in parallel, each one covering all of its hands in a
+    single pass since the hands share most of their recursion.
+    """
+    if workers == 1:
+        by_upcard = [solve_upcard(u, rules) for u in UPCARDS]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            by_upcard = list(pool.map(solve_upcard, UPCARDS, [rules] * len(UPCARDS)))
+    return [
+        {"Category": category, "Hand": name, **{col: entries[name] for col, entries in zip(COLUMNS, by_upcard)}}
+        for category, name, _, _ in PAIR_ROWS + SOFT_ROWS + HARD_ROWS
+    ]
+
+
+def write_chart(rows: list[dict[str, str]], file: str | Path):
+    # Loadable with StandardStrategy(strategy_file=...) and I18Strategy(strategy_file=...)
+    with open(file, "w", newline="") as f:
+        writer = csv.DictWriter(f, ["Category", "Hand"] + COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve the basic strategy chart for a set of table rules.")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--n-decks", type=int, default=6)
+    parser.add_argument("--s17", action="store_true", help="the dealer stands on soft 17")
+    parser.add_argument("--no-das", action="store_true", help="no doubling after splits")
+    parser.add_argument("--blackjack-payout", type=float, default=1.5, help="1.2 for 6:5")
+    parser.add_argument("--max-splits", type=int)
+    parser.add_argument("--no-resplit-aces", action="store_true")
+    parser.add_argument("--no-hit-split-aces", action="store_true")
+    parser.add_argument("--surrender", action="store_true", help="late surrender")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    rules = Rules(
+        n_decks=args.n_decks,
+        hit_soft_17=not args.s17,
+        double_after_split=not args.no_das,
+        blackjack_payout=args.blackjack_payout,
+        max_splits=args.max_splits,
+        resplit_aces=not args.no_resplit_aces,
+        hit_split_aces=not args.no_hit_split_aces,
+        surrender=args.surrender,
+    )
+    write_chart(solve(rules, args.workers), args.output)
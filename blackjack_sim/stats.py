@@ -0,0 +1,305 @@
+import numpy as np
+
+
+class RunningStats:
+    """Online mean and variance (Welford), elementwise over a fixed shape.
+
+    Two accumulators merge exactly with Chan's parallel update, so partial
+    statistics from several workers can be combined in any grouping.
+    """
+
+    def __init__(self, shape: tuple[int, ...] = ()):
+        self.n: int = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean = self.mean + delta / self.n
+        self.m2 = self.m2 + delta * (x - self.mean)
+
+    def add_batch(self, xs: np.ndarray):
+        # Rows of `xs` are samples
+        if len(xs):
+            other = RunningStats(self.mean.shape)
+            other.n = len(xs)
+            other.mean = xs.mean(axis=0)
+            other.m2 = ((xs - other.mean) ** 2).sum(axis=0)
+            self.merge(other)
+
+    def merge(self, other: "RunningStats"):
+        n = self.n + other.n
+        if not n:
+            return
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.n / n
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+
+    def var(self) -> np.ndarray:
+        return self.m2 / (self.n - 1) if self.n > 1 else np.full_like(self.mean, np.inf)
+
+    def sd(self) -> np.ndarray:
+        return np.sqrt(self.var())
+
+    def se(self) -> np.ndarray:
+        return self.sd() / np.sqrt(self.n) if self.n else np.full_like(self.mean, np.inf)
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "mean": self.mean.tolist(), "m2": self.m2.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunningStats":
+        stats = cls()
+        stats.n = data["n"]
+        stats.mean = np.asarray(data["mean"], dtype=float)
+        stats.m2 = np.asarray(data["m2"], dtype=float)
+        return stats
+
+
+class Histogram:
+    """Counts over fixed bin edges, elementwise over leading dimensions.
+
+    Values below the first edge or at or above the last are counted in the
+    first and last of the `len(edges) + 1` bins, so nothing is dropped.
+    Histograms with the same edges merge by adding counts, which is exact.
+    """
+
+    def __init__(self, edges, shape: tuple[int, ...] = ()):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(shape + (len(self.edges) + 1,), dtype=np.int64)
+
+    def add_batch(self, xs: np.ndarray):
+        # Rows of `xs` are samples, each of the histogram's leading shape
+        xs = np.asarray(xs, dtype=float).reshape(-1, *self.counts.shape[:-1])
+        bins = np.searchsorted(self.edges, xs, side="right")
+        n_bins = self.counts.shape[-1]
+        flat = self.counts.reshape(-1, n_bins)
+        for i, column in enumerate(bins.reshape(len(xs), -1).T):
+            flat[i] += np.bincount(column, minlength=n_bins)
+
+    def merge(self, other: "Histogram"):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only histograms with the same edges can be merged.")
+        self.counts += other.counts
+
+    def to_dict(self) -> dict:
+        return {"edges": self.edges.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        counts = np.asarray(data["counts"], dtype=np.int64)
+        histogram = cls(data["edges"], counts.shape[:-1])
+        histogram.counts = counts
+        return histogram
+
+
+class QuantileSketch:
+    """Quantiles with bounded relative error (DDSketch), elementwise over a fixed shape.
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within `relative_accuracy` of a value of the right rank, whatever the
+    number of samples. Magnitudes below `min_value` count as zero. At most
+    `max_buckets` buckets are kept per sign; past that the smallest
+    magnitudes are collapsed together, which only costs accuracy near zero.
+    Sketches with the same accuracy merge by adding counts, which is exact.
+    """
+
+    def __init__(self, relative_accuracy: float = .01, shape: tuple[int, ...] = (), min_value: float = 1e-9, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.shape = shape
+        self.min_value = min_value
+        self.max_buckets = max_buckets
+        # Buckets of keys min_key onward, flattened over the shape
+        self.min_key = 0
+        self.positive = np.zeros((int(np.prod(shape)), 0), dtype=np.int64)
+        self.negative = np.zeros_like(self.positive)
+        self.zero = np.zeros(len(self.positive), dtype=np.int64)
+
+    @property
+    def n(self) -> np.ndarray:
+        return (self.positive.sum(axis=1) + self.negative.sum(axis=1) + self.zero).reshape(self.shape)
+
+    def add_batch(self, xs: np.ndarray):
+        # Rows of `xs` are samples, each of the sketch's shape
+        xs = np.asarray(xs, dtype=float).reshape(-1, len(self.zero))
+        magnitude = np.abs(xs)
+        nonzero = magnitude >= self.min_value
+        keys = np.ceil(np.log(np.where(nonzero, magnitude, 1)) / np.log(self.gamma)).astype(int)
+        if nonzero.any():
+            self._cover(keys[nonzero].min(), keys[nonzero].max())
+        keys = np.maximum(keys - self.min_key, 0)
+        n_keys = self.positive.shape[1]
+        for i in range(len(self.zero)):
+            for store, side in ((self.positive, xs[:, i] > 0), (self.negative, xs[:, i] < 0)):
+                side &= nonzero[:, i]
+                store[i] += np.bincount(keys[side, i], minlength=n_keys)
+            self.zero[i] += (~nonzero[:, i]).sum()
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy or other.shape != self.shape:
+            raise ValueError("Only sketches with the same accuracy and shape can be merged.")
+        if other.positive.shape[1]:
+            self._cover(other.min_key, other.min_key + other.positive.shape[1] - 1)
+            self._add_stores(other.positive, other.negative, other.min_key)
+        self.zero += other.zero
+
+    def quantile(self, q) -> np.ndarray:
+        """Values at quantiles `q`, shape (len(q),) + shape; NaN where nothing was added."""
+        q = np.atleast_1d(q)
+        values = self._bucket_values()
+        # Ascending order: large negative values, zero, then positive values
+        ordered_values = np.concatenate([-values[::-1], [0.], values])
+        out = np.full((len(q), len(self.zero)), np.nan)
+        for i in range(len(self.zero)):
+            counts = np.concatenate([self.negative[i, ::-1], [self.zero[i]], self.positive[i]])
+            total = counts.sum()
+            if total:
+                rank = np.searchsorted(np.cumsum(counts), q * (total - 1), side="right")
+                out[:, i] = ordered_values[rank]
+        return out.reshape((len(q),) + self.shape)
+
+    def _bucket_values(self) -> np.ndarray:
+        keys = self.min_key + np.arange(self.positive.shape[1])
+        return 2 * self.gamma ** keys / (self.gamma + 1)
+
+    def _cover(self, low: int, high: int):
+        # Grows the bucket range to hold keys low to high, collapsing the lowest past max_buckets
+        n_keys = self.positive.shape[1]
+        old_min = self.min_key if n_keys else low
+        new_max = max(old_min + n_keys - 1, high)
+        new_min = max(min(old_min, low), new_max - self.max_buckets + 1)
+        if n_keys and new_min == self.min_key and new_max == self.min_key + n_keys - 1:
+            return
+        positive, negative = self.positive, self.negative
+        self.positive = np.zeros((len(self.zero), new_max - new_min + 1), dtype=np.int64)
+        self.negative = np.zeros_like(self.positive)
+        self.min_key = int(new_min)
+        self._add_stores(positive, negative, old_min)
+
+    def _add_stores(self, positive: np.ndarray, negative: np.ndarray, min_key: int):
+        # Adds bucket counts starting at key `min_key`, those below the range into the lowest bucket
+        index = np.maximum(min_key + np.arange(positive.shape[1]) - self.min_key, 0)
+        np.add.at(self.positive, (slice(None), index), positive)
+        np.add.at(self.negative, (slice(None), index), negative)
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "shape": list(self.shape),
+            "min_value": self.min_value,
+            "max_buckets": self.max_buckets,
+            "min_key": self.min_key,
+            "positive": self.positive.tolist(),
+            "negative": self.negative.tolist(),
+            "zero": self.zero.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], tuple(data["shape"]), data["min_value"], data["max_buckets"])
+        sketch.min_key = data["min_key"]
+        n = len(sketch.zero)
+        sketch.positive = np.asarray(data["positive"], dtype=np.int64).reshape(n, -1)
+        sketch.negative = np.asarray(data["negative"], dtype=np.int64).reshape(n, -1)
+        sketch.zero = np.asarray(data["zero"], dtype=np.int64)
+        return sketch
+
+
+class OutcomeStats:
+    """Constant-memory summary of simulated outcomes, per seat.
+
+    Fed one shoe at a time by Game or many at once by the batch runners:
+    round PnL moments from per-shoe sums, plus moments, a histogram and a
+    quantile sketch of shoe PnL and of each shoe's maximum drawdown. Every
+    part merges exactly, so workers can summarise their shoes and send
+    only this back.
+    """
+
+    QUANTILES = (.01, .05, .5, .95, .99)
+
+    def __init__(self, n_seats: int = 1, edges=range(-100, 101), relative_accuracy: float = .01):
+        shape = (n_seats,)
+        self.shoes = 0
+        # Exact sums: bets are whole units and payouts multiples of half a bet
+        self.rounds = np.zeros(n_seats, dtype=np.int64)
+        self.hands = np.zeros(n_seats, dtype=np.int64)
+        self.pnl = np.zeros(n_seats)
+        self.round_pnl_sq = np.zeros(n_seats)
+        self.shoe_pnl = RunningStats(shape)
+        self.shoe_histogram = Histogram(edges, shape)
+        self.shoe_quantiles = QuantileSketch(relative_accuracy, shape)
+        self.drawdown_quantiles = QuantileSketch(relative_accuracy, shape)
+
+    def add_shoes(self, pnl, rounds, hands, round_pnl_sq, max_drawdown):
+        # Rows are shoes and columns seats, a single shoe may be one row
+        pnl, max_drawdown = np.atleast_2d(pnl), np.atleast_2d(max_drawdown)
+        self.shoes += len(pnl)
+        self.rounds += np.atleast_2d(rounds).sum(axis=0)
+        self.hands += np.atleast_2d(hands).sum(axis=0)
+        self.pnl += pnl.sum(axis=0)
+        self.round_pnl_sq += np.atleast_2d(round_pnl_sq).sum(axis=0)
+        self.shoe_pnl.add_batch(pnl)
+        self.shoe_histogram.add_batch(pnl)
+        self.shoe_quantiles.add_batch(pnl)
+        self.drawdown_quantiles.add_batch(max_drawdown)
+
+    def merge(self, other: "OutcomeStats") -> "OutcomeStats":
+        self.shoes += other.shoes
+        for name in ("rounds", "hands", "pnl", "round_pnl_sq"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.shoe_pnl.merge(other.shoe_pnl)
+        self.shoe_histogram.merge(other.shoe_histogram)
+        self.shoe_quantiles.merge(other.shoe_quantiles)
+        self.drawdown_quantiles.merge(other.drawdown_quantiles)
+        return self
+
+    def ev_per_round(self) -> np.ndarray:
+        return self.pnl / self.rounds
+
+    def sd_per_round(self) -> np.ndarray:
+        return np.sqrt(self.round_pnl_sq / self.rounds - self.ev_per_round() ** 2)
+
+    def se_per_round(self) -> np.ndarray:
+        return self.shoe_pnl.se() / (self.rounds / self.shoes)
+
+    def to_dict(self) -> dict:
+        return {
+            "shoes": self.shoes,
+            **{name: getattr(self, name).tolist() for name in ("rounds", "hands", "pnl", "round_pnl_sq")},
+            "shoe_pnl": self.shoe_pnl.to_dict(),
+            "shoe_histogram": self.shoe_histogram.to_dict(),
+            "shoe_quantiles": self.shoe_quantiles.to_dict(),
+            "drawdown_quantiles": self.drawdown_quantiles.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OutcomeStats":
+        stats = cls(len(data["rounds"]))
+        stats.shoes = data["shoes"]
+        stats.rounds = np.array(data["rounds"], dtype=np.int64)
+        stats.hands = np.array(data["hands"], dtype=np.int64)
+        stats.pnl = np.array(data["pnl"])
+        stats.round_pnl_sq = np.array(data["round_pnl_sq"])
+        stats.shoe_pnl = RunningStats.from_dict(data["shoe_pnl"])
+        stats.shoe_histogram = Histogram.from_dict(data["shoe_histogram"])
+        stats.shoe_quantiles = QuantileSketch.from_dict(data["shoe_quantiles"])
+        stats.drawdown_quantiles = QuantileSketch.from_dict(data["drawdown_quantiles"])
+        return stats
+
+    def summary(self, names: list[str] | None = None) -> str:
+        names = names or [f"seat {k}" for k in range(len(self.rounds))]
+        pnl_q = self.shoe_quantiles.quantile(self.QUANTILES)
+        drawdown_q = self.drawdown_quantiles.quantile(self.QUANTILES)
+        percentiles = "/".join(f"P{q * 100:g}" for q in self.QUANTILES)
+        lines = [f"{self.shoes} shoes"]
+        for k, name in enumerate(names):
+            lines.extend([
+                f"{name}",
+                f"  ev/round {self.ev_per_round()[k]:.5f} +- {self.se_per_round()[k]:.5f}, sd/round {self.sd_per_round()[k]:.3f}",
+                f"  shoe pnl     {percentiles} {' '.join(f'{v:.1f}' for v in pnl_q[:, k])}",
+                f"  max drawdown {percentiles} {' '.join(f'{v:.1f}' for v in drawdown_q[:, k])}",
+            ])
+        return "\n".join(lines)
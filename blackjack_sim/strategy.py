@@ -1,27 +1,43 @@
 from pathlib import Path
-
-import numpy as np
-import pandas as pd
+from time import perf_counter
 
 from blackjack_sim.base import (
-    ACTION_MAPPING,
+    UPCARD_INDEX,
     Action,
     Hand,
     Shoe
 )
+from blackjack_sim.probability import (
+    RANK_CLASS,
+    BudgetExceeded,
+    action_evs,
+    remaining_composition,
+)
+from blackjack_sim.rules import Rules
+from blackjack_sim.tables import (
+    ACTIONS,
+    I18_FILE,
+    NO_ACTION,
+    STANDARD_FILE,
+    column,
+    i18_table,
+    standard_table,
+)
 
 class DumbassStrategy:
-    def __init__(self, dealer, shoe):
+    def __init__(self, dealer, shoe, rules: Rules | None = None):
         # Strategies are given access to both dealer and shoe
         # Strategies should access only the first card of the dealer's hand
         # Strategies should access only cards in shoe.cards[0:shoe.idx]
         self.dealer = dealer
         self.shoe = shoe
+        # Strategies play the dealer's rules unless given others
+        self.rules: Rules = dealer.rules if rules is None else rules
 
     def action(self, hand: Hand) -> Action:
         if hand.is_splittable():
             return Action.SPLIT
-        elif hand.value() == 11 and len(hand.cards) == 2:
+        elif hand.value() == 11 and len(hand.cards) == 2 and (self.rules.double_after_split or not hand.from_split):
             return Action.DHIT
         elif hand.value() < 17:
             return Action.HIT
@@ -32,184 +48,166 @@ class DumbassStrategy:
         return 1
 
 class StandardStrategy:
-    def __init__(self, dealer, shoe):
+    def __init__(
+        self,
+        dealer,
+        shoe,
+        count_system: str = "hi_lo",
+        min_bet: int = 1,
+        max_bet: int = 6,
+        strategy_file: str | Path = STANDARD_FILE,
+        rules: Rules | None = None,
+    ):
         self.dealer = dealer
         self.shoe = shoe
-        self.strategy_mapping = self._init_strategy()
-        self.count_values = np.array([-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1])
+        self.rules: Rules = dealer.rules if rules is None else rules
+        # A basic strategy chart, such as one written by solver.py
+        self.table = standard_table(strategy_file, self.rules)
+        # The shoe must track this system, see Shoe(count_systems=...)
+        self.count_system = count_system
+        # Bets ramp one unit per true count between these
+        self.min_bet = min_bet
+        self.max_bet = max_bet
 
     def action(self, hand: Hand) -> Action:
-        if self.dealer.hand.cards[0].rank == 0:
-            dealer_card_name = "A"
-        elif self.dealer.hand.cards[0].rank >= 9:
-            dealer_card_name = "10"
-        else:
-            dealer_card_name = str(self.dealer.hand.cards[0].value)
-        
-        if hand.is_splittable():
-            if action := self.strategy_mapping.get((hand.name(), dealer_card_name)):
-                return action
-            else:
-                hand_name = str(hand.value())
-        else:
-            hand_name = hand.name()
-        
-        action = self.strategy_mapping[(hand_name, dealer_card_name)]
-        
-        if action == Action.DHIT and len(hand.cards) != 2:
-            action = Action.HIT
-
-        return action
+        upcard = UPCARD_INDEX[self.dealer.hand.cards[0].rank]
+        return ACTIONS[self.table.action_rows[hand.state()][upcard][column(hand)]]
 
     def bet_size(self) -> int:
         if self.shoe.is_active():
             true_count_bet_index = int(self.get_true_count())
-            if true_count_bet_index < 1:
-                return 1
-            elif true_count_bet_index >= 6:
-                return 6
+            if true_count_bet_index < self.min_bet:
+                return self.min_bet
+            elif true_count_bet_index >= self.max_bet:
+                return self.max_bet
             else:
                 return true_count_bet_index
         else:
-            return 1
+            return self.min_bet
     
     def get_true_count(self) -> float:
-        cards_left_approx = self.shoe.shoe_size - self.shoe.idx + 1 if self.shoe.shoe_size - self.shoe.idx + 1 > 0 else 1
-        return self.get_count() / cards_left_approx * 52
+        return self.shoe.true_count(self.count_system)
 
     def get_count(self) -> int:
-        return np.dot(self.shoe.card_counts, self.count_values)
+        return self.shoe.count(self.count_system)
     # def bet_size(self) -> int:
     #     return 1
 
-    def _init_strategy(self) -> dict:
-        # TODO: standardize strategy mapping hand nomenclature
-        file = Path(__file__).resolve().parent / "assets" / "standard_strategy.csv"
-        strat_df = pd.read_csv(file)
-        dealer_card_names = [str(i) for i in range(2, 11)] + ["A"]
-        strategy_mapping = {}
-        for _, row in strat_df.iterrows():
-            for dcn in dealer_card_names:
-                if row[dcn] == "H":
-                    strategy_mapping[(row.Hand, dcn)] = Action.HIT
-                elif row[dcn] == "S":
-                    strategy_mapping[(row.Hand, dcn)] = Action.STAY
-                elif row[dcn] in ("D", "Ds"):
-                    strategy_mapping[(row.Hand, dcn)] = Action.DHIT
-                elif row[dcn] == "Y":
-                    strategy_mapping[(row.Hand, dcn)] = Action.SPLIT
-        return strategy_mapping
-
 
 class I18Strategy:
-    def __init__(self, dealer, shoe):
+    def __init__(
+        self,
+        dealer,
+        shoe,
+        count_system: str = "hi_lo",
+        min_bet: int = 1,
+        max_bet: int = 6,
+        insurance_index: float = 3,
+        index_shift: float = 0,
+        strategy_file: str | Path = STANDARD_FILE,
+        index_file: str | Path = I18_FILE,
+        rules: Rules | None = None,
+    ):
         self.dealer = dealer
         self.shoe: Shoe = shoe
-        self.standard_strategy = self._init_standard_strategy()
-        self.count_values = np.array([-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1])
-        self.i18_indices = self._init_i18_indices()
+        self.rules: Rules = dealer.rules if rules is None else rules
+        # index_shift moves every deviation index by the same amount. index_file
+        # holds the index plays, such as a file written by indices.py
+        self.table = i18_table(index_shift, strategy_file, self.rules, index_file)
+        # The shoe must track this system, see Shoe(count_systems=...)
+        self.count_system = count_system
+        # Bets ramp one unit per true count between these
+        self.min_bet = min_bet
+        self.max_bet = max_bet
+        self.insurance_index = insurance_index
 
     def action(self, hand: Hand) -> Action:
         if self.shoe.is_active() and (action := self.check_i18(hand)):
             return action
-        
-        if self.dealer.hand.cards[0].rank == 0:
-            dealer_card_name = "A"
-        elif self.dealer.hand.cards[0].rank >= 9:
-            dealer_card_name = "10"
-        else:
-            dealer_card_name = str(self.dealer.hand.cards[0].value)
-        
-        if hand.is_splittable():
-            if action := self.standard_strategy.get((hand.name(), dealer_card_name)):
-                return action
-            else:
-                hand_name = str(hand.value())
-        else:
-            hand_name = hand.name()
-        action = self.standard_strategy[(hand_name, dealer_card_name)]
-        if action == Action.DHIT and len(hand.cards) != 2:
-            action = Action.HIT
-        return action
+        upcard = UPCARD_INDEX[self.dealer.hand.cards[0].rank]
+        return ACTIONS[self.table.action_rows[hand.state()][upcard][column(hand)]]
 
     def bet_size(self) -> int:
         if self.shoe.is_active():
             true_count_bet_index = int(self.get_true_count())
-            if true_count_bet_index < 1:
-                return 1
-            elif true_count_bet_index >= 6:
-                return 6
+            if true_count_bet_index < self.min_bet:
+                return self.min_bet
+            elif true_count_bet_index >= self.max_bet:
+                return self.max_bet
             else:
                 return true_count_bet_index
         else:
-            return 1
+            return self.min_bet
+
+    def get_true_count(self) -> float:
+        return self.shoe.true_count(self.count_system)
 
-    def get_true_count(self) -> int:
-        cards_left_approx = self.shoe.shoe_size - self.shoe.idx + 1 if self.shoe.shoe_size - self.shoe.idx + 1 > 0 else 1
-        return self.get_count() / cards_left_approx * 52
-    
     def get_count(self) -> int:
-        return np.dot(self.shoe.card_counts, self.count_values)
+        return self.shoe.count(self.count_system)
 
-    def check_i18(self, hand: Hand) -> Action:
-        true_count = self.get_true_count()
-        if hand.value() == 20 and hand.is_splittable():
-            if self.dealer.hand.cards[0].value == 5 and true_count >= 5:
-                return Action.SPLIT
-            if self.dealer.hand.cards[0].value == 6 and true_count >= 5:
-                return Action.SPLIT
-        dealer_key = self.dealer.hand.cards[0].value if self.dealer.hand.cards[0].rank != 0 else 1
-        key = (str(hand.value()), str(dealer_key))
-        if benchmark_entry := self.i18_indices.get(key):
-            if true_count < benchmark_entry["index"]:
-                action = benchmark_entry["under"]
-            else:
-                action = benchmark_entry["over"]
-        
-            if action == Action.DHIT and len(hand.cards) != 2:
-                action = Action.HIT
-            return action
-            
-    def _init_i18_indices(self) -> dict:
-        file = Path(__file__).resolve().parent / "assets" / "i18_strategy.csv"
-        strat_df = pd.read_csv(file)
-        indices = {}
-        for _, row in strat_df.iterrows():
-            indices[(str(row.hand_value), str(row.dealer))] = {
-                "index": row["index"],
-                "over": ACTION_MAPPING[row["decision_over"]],
-                "under": ACTION_MAPPING[row["decision_under"]]
-            }
-        return indices
+    def check_i18(self, hand: Hand) -> Action | None:
+        state = hand.state()
+        upcard = UPCARD_INDEX[self.dealer.hand.cards[0].rank]
+        index = self.table.index_rows[state][upcard]
+        if index is None:
+            return None
+        if self.get_true_count() < index:
+            code = self.table.under_rows[state][upcard][column(hand)]
+        else:
+            code = self.table.over_rows[state][upcard][column(hand)]
+        if code != NO_ACTION:
+            return ACTIONS[code]
     
     def insurance(self) -> bool:
         true_count = self.get_true_count()
-        return true_count >= 3
+        return true_count >= self.insurance_index
+
+class OptimalStrategy(I18Strategy):
+    """Plays the action with the highest expected return for the exact cards left.
+
+    Evaluations are cached by (upcard, composition) and the dealer subtrees
+    they need are shared across nearby compositions, see probability.action_evs.
+    A decision that runs over `time_budget` seconds falls back to the I18 table.
+    Bets follow the I18 ramp.
+    """
 
-    def _init_standard_strategy(self) -> dict:
-        # TODO: standardize strategy mapping hand nomenclature
-        file = Path(__file__).resolve().parent / "assets" / "standard_strategy.csv"
-        strat_df = pd.read_csv(file)
-        dealer_card_names = [str(i) for i in range(2, 11)] + ["A"]
-        strategy_mapping = {}
-        for _, row in strat_df.iterrows():
-            for dcn in dealer_card_names:
-                if row[dcn] == "H":
-                    strategy_mapping[(row.Hand, dcn)] = Action.HIT
-                elif row[dcn] == "S":
-                    strategy_mapping[(row.Hand, dcn)] = Action.STAY
-                elif row[dcn] in ("D", "Ds"):
-                    strategy_mapping[(row.Hand, dcn)] = Action.DHIT
-                elif row[dcn] == "Y":
-                    strategy_mapping[(row.Hand, dcn)] = Action.SPLIT
-        return strategy_mapping
+    def __init__(self, dealer, shoe, count_system: str = "hi_lo", time_budget: float = .01, **kwargs):
+        super().__init__(dealer, shoe, count_system=count_system, **kwargs)
+        self.time_budget = time_budget
+        self.decisions = 0
+        self.fallbacks = 0
+
+    def action(self, hand: Hand) -> Action:
+        self.decisions += 1
+        two_cards = len(hand.cards) == 2
+        try:
+            evs = action_evs(
+                total=hand.total,
+                soft=hand.soft_aces > 0,
+                can_double=two_cards and (self.rules.double_after_split or not hand.from_split),
+                split_class=RANK_CLASS[hand.cards[0].rank] if hand.pair else None,
+                upcard=RANK_CLASS[self.dealer.hand.cards[0].rank],
+                composition=remaining_composition(self.shoe),
+                deadline=perf_counter() + self.time_budget,
+                rules=self.rules,
+                can_surrender=two_cards and self.rules.surrender and not hand.from_split,
+            )
+        except BudgetExceeded:
+            self.fallbacks += 1
+            return super().action(hand)
+        return max(evs, key=evs.get)
+
+    def insurance(self) -> bool:
+        # Worth it once a ten is likelier than the payout's break even
+        composition = remaining_composition(self.shoe)
+        return composition[9] / sum(composition) > 1 / (1 + self.rules.insurance_payout)
 
 class ManualStrategy(I18Strategy):
-    def __init__(self, dealer, shoe):
+    def __init__(self, dealer, shoe, rules: Rules | None = None):
         # Strategies are given access to both dealer and shoe
         # Strategies should access only the first card of the dealer's hand
         # Strategies should access only cards in shoe.cards[0:shoe.idx]
-        super().__init__(dealer, shoe)
+        super().__init__(dealer, shoe, rules=rules)
         
         self.dealer = dealer
         self.shoe = shoe
@@ -221,12 +219,14 @@ class ManualStrategy(I18Strategy):
         
         action = None
         while True:
-            print("(h)it/(s)tay/(sp)lit/(d)ouble/(con)text: ", end='')
+            print("(h)it/(s)tay/(sp)lit/(d)ouble/su(r)render/(con)text: ", end='')
             x = input()
             if x == "sp" and hand.is_splittable():
                 action = Action.SPLIT
-            elif x == "d" and len(hand.cards) == 2:
+            elif x == "d" and len(hand.cards) == 2 and (self.rules.double_after_split or not hand.from_split):
                 action = Action.DHIT
+            elif x == "r" and self.rules.surrender and len(hand.cards) == 2 and not hand.from_split:
+                action = Action.SURRENDER
             elif x == "h":
                 action = Action.HIT
             elif x == "s":
@@ -235,7 +235,7 @@ class ManualStrategy(I18Strategy):
                 print(f"Count: {self.get_count()}")
                 print(f"True Count: {self.get_true_count()}")
             else:
-                print("Invalid input.\nHit: h\nStay: s\nDouble: d\nSplit: sp\nContext: con")
+                print("Invalid input.\nHit: h\nStay: s\nDouble: d\nSplit: sp\nSurrender: r\nContext: con")
             
             if action is not None:
                 i18_action = self.i18_strat(hand)
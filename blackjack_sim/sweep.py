@@ -0,0 +1,175 @@
+import argparse
+import json
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+
+from blackjack_sim.strategy import (
+    DumbassStrategy,
+    I18Strategy,
+    StandardStrategy,
+)
+from blackjack_sim.rng import shoe_orders
+from blackjack_sim.stats import OutcomeStats
+from blackjack_sim.utils import ENGINE_VERSION
+from blackjack_sim.vector import VectorGame
+
+STRATEGIES = {cls.__name__: cls for cls in (DumbassStrategy, StandardStrategy, I18Strategy)}
+# Parameters of the shoe, every other parameter is passed to the strategy
+SHOE_PARAMS = ("n_decks", "pen")
+DEFAULTS = {"strategy": "I18Strategy", "n_decks": 6, "pen": .9}
+RESULTS_FILE = "results.jsonl"
+METRICS = (
+    "shoes", "rounds", "hands", "ev_per_round", "sd_per_round", "se_per_round",
+    "n0", "risk_of_ruin", "p_losing_shoe", "shoe_pnl_p05",
+)
+
+
+def load_config(path: str | Path) -> dict:
+    """Reads a sweep config from TOML or JSON.
+
+    `grid` maps parameter names to lists of values; every combination is a
+    cell. With `search = "random"`, `samples` cells are drawn instead, and a
+    parameter may also be a `{min, max}` range, sampled uniformly (integers
+    when both ends are). Parameters are `strategy`, `n_decks`, `pen` and the
+    strategy's keyword arguments: `min_bet`, `max_bet`, `insurance_index` and
+    `index_shift`. `n_shoes`, `seed`, `batch_size` and `bankroll` (in units,
+    for the risk of ruin) apply to every cell.
+    """
+    path = Path(path)
+    if path.suffix == ".toml":
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    return json.loads(path.read_text())
+
+
+def cells(config: dict) -> list[dict]:
+    grid = config["grid"]
+    if config.get("search", "grid") == "grid":
+        for name, values in grid.items():
+            if not isinstance(values, list):
+                raise ValueError(f"Grid search needs a list of values for {name}.")
+        return [{**DEFAULTS, **dict(zip(grid, values))} for values in product(*grid.values())]
+
+    rng = np.random.default_rng(config.get("seed", 0))
+    sampled = []
+    for _ in range(config["samples"]):
+        cell = dict(DEFAULTS)
+        for name, values in grid.items():
+            if isinstance(values, list):
+                cell[name] = values[rng.integers(len(values))]
+            elif isinstance(values["min"], int) and isinstance(values["max"], int):
+                cell[name] = int(rng.integers(values["min"], values["max"] + 1))
+            else:
+                cell[name] = float(rng.uniform(values["min"], values["max"]))
+        sampled.append(cell)
+    return sampled
+
+
+def cell_key(cell: dict, settings: dict) -> str:
+    # Results from another engine version or other run settings are not reused
+    return json.dumps({**cell, **settings, "engine": ENGINE_VERSION}, sort_keys=True)
+
+
+def run_sweep(config: dict, out_dir: str | Path, workers: int = 1) -> list[dict]:
+    """Runs every cell of the config not already in `out_dir`, returning all results.
+
+    Shoe `i` is the same for every cell with the same deck count, see
+    rng.shoe_orders, so cells are compared on identical cards. Each finished
+    cell is appended to `out_dir/results.jsonl` straight away, and a rerun
+    skips the cells found there with the same `n_shoes`, `seed`, `batch_size`
+    and `bankroll`.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    results_file = out_dir / RESULTS_FILE
+    done = {}
+    if results_file.exists():
+        for line in results_file.read_text().splitlines():
+            row = json.loads(line)
+            done[row["key"]] = row
+
+    settings = {
+        "n_shoes": config.get("n_shoes", 1000),
+        "seed": config.get("seed", 0),
+        "batch_size": config.get("batch_size", 500),
+        "bankroll": config.get("bankroll", 200),
+    }
+    todo = [cell for cell in cells(config) if cell_key(cell, settings) not in done]
+
+    with open(results_file, "a") as f:
+        def record(row):
+            done[row["key"]] = row
+            f.write(json.dumps(row) + "\n")
+            f.flush()
+
+        if workers == 1:
+            for cell in todo:
+                record(run_cell(cell, **settings))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(run_cell, cell, **settings) for cell in todo]
+                for future in as_completed(futures):
+                    record(future.result())
+
+    keys = [cell_key(cell, settings) for cell in cells(config)]
+    return [done[key] for key in dict.fromkeys(keys)]
+
+
+def run_cell(cell: dict, n_shoes: int, seed: int, batch_size: int, bankroll: float) -> dict:
+    strategy_params = {k: v for k, v in cell.items() if k not in SHOE_PARAMS and k != "strategy"}
+    strategy = partial(STRATEGIES[cell["strategy"]], **strategy_params)
+    stats = OutcomeStats()
+    for start in range(0, n_shoes, batch_size):
+        shoes = shoe_orders(seed, start, min(start + batch_size, n_shoes), cell["n_decks"])
+        game = VectorGame(shoes, [strategy], n_decks=cell["n_decks"], pen=cell["pen"])
+        game.play()
+        game.add_to(stats)
+
+    ev, sd = stats.ev_per_round()[0], stats.sd_per_round()[0]
+    var = sd ** 2
+    # Shoes that lost anything: the histogram bins below its zero edge
+    losing = stats.shoe_histogram.counts[0, :np.searchsorted(stats.shoe_histogram.edges, 0) + 1].sum()
+    return {
+        "key": cell_key(cell, dict(n_shoes=n_shoes, seed=seed, batch_size=batch_size, bankroll=bankroll)),
+        **cell,
+        "shoes": n_shoes,
+        "rounds": int(stats.rounds[0]),
+        "hands": int(stats.hands[0]),
+        "ev_per_round": ev,
+        "sd_per_round": sd,
+        "se_per_round": stats.se_per_round()[0],
+        # Rounds needed for the edge to equal one standard deviation
+        "n0": var / ev ** 2 if ev > 0 else None,
+        # Diffusion estimate of ever losing `bankroll` units when playing on indefinitely
+        "risk_of_ruin": float(np.exp(-2 * ev * bankroll / var)) if ev > 0 else 1.,
+        "p_losing_shoe": float(losing / n_shoes),
+        # Within the sketch's 1% relative accuracy
+        "shoe_pnl_p05": float(stats.shoe_quantiles.quantile(.05)[0, 0]),
+    }
+
+
+def results_table(results: list[dict]) -> str:
+    if not results:
+        return ""
+    params = [k for k in results[0] if k not in METRICS and k != "key"]
+    columns = params + ["ev_per_round", "sd_per_round", "se_per_round", "risk_of_ruin", "p_losing_shoe"]
+    lines = [" ".join(f"{c:>14}" for c in columns)]
+    for row in results:
+        lines.append(" ".join(
+            f"{row[c]:>14.5f}" if isinstance(row[c], float) else f"{str(row[c]):>14}" for c in columns
+        ))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep strategy and shoe parameters from a config file.")
+    parser.add_argument("config", type=Path)
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    print(results_table(run_sweep(load_config(args.config), args.out_dir, workers=args.workers)))
@@ -0,0 +1,211 @@
+import csv
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+
+from blackjack_sim.base import (
+    N_STATES,
+    PAIR_STATE,
+    SOFT_STATE,
+    Action,
+)
+from blackjack_sim.rules import Rules
+
+ASSETS = Path(__file__).resolve().parent / "assets"
+STANDARD_FILE = ASSETS / "standard_strategy.csv"
+I18_FILE = ASSETS / "i18_strategy.csv"
+
+# Action codes, indexing ACTIONS
+HIT, STAY, DHIT, SPLIT, SURRENDER = 0, 1, 2, 3, 4
+NO_ACTION = -1
+ACTIONS = (Action.HIT, Action.STAY, Action.DHIT, Action.SPLIT, Action.SURRENDER)
+_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+# Column order of the upcard axis, see base.UPCARD_INDEX
+DEALER_CARD_NAMES = ["A"] + [str(i) for i in range(2, 11)]
+
+# Last axis of a StrategyTable, see column()
+MORE_CARDS, TWO_CARDS, SPLIT_TWO_CARDS = 0, 1, 2
+# Pair entries: split, never, only with doubling after splits, surrender or else split
+PAIR_CODES = ("Y", "N", "Y/N", "Rp")
+
+
+def chart_codes(rules: Rules = Rules()) -> dict[str, tuple[int, int, int]]:
+    # Chart entries as codes along the last axis. Doubles after a split need
+    # the rules to allow them, surrender is only offered on the first two
+    # cards and plays the fallback otherwise. Deviations can also split, P.
+    das, surrender = rules.double_after_split, rules.surrender
+    return {
+        "H": (HIT, HIT, HIT),
+        "S": (STAY, STAY, STAY),
+        "D": (HIT, DHIT, DHIT if das else HIT),
+        "Ds": (STAY, DHIT, DHIT if das else STAY),
+        "Rh": (HIT, SURRENDER if surrender else HIT, HIT),
+        "Rs": (STAY, SURRENDER if surrender else STAY, STAY),
+        "P": (SPLIT, SPLIT, SPLIT),
+    }
+
+
+def column(hand) -> int:
+    # StrategyTable column of a Hand
+    return (len(hand.cards) == 2) * (1 + hand.from_split)
+
+
+class StrategyTable:
+    """Integer coded decisions indexed by (Hand.state(), upcard, column).
+
+    The last axis tells hands of more cards, of two cards and of two cards
+    after a split apart, see column(), since doubling and surrender depend on
+    it. Optional deviations are true count thresholds per (state, upcard): at
+    or above `index` the `over` code applies, below it `under`; NaN marks
+    cells without a deviation and NO_ACTION falls back to `actions`.
+    """
+
+    def __init__(self, actions: np.ndarray, index: np.ndarray | None = None, over: np.ndarray | None = None, under: np.ndarray | None = None):
+        self.actions = actions
+        self.index = index
+        self.over = over
+        self.under = under
+
+        # Tables are shared by every strategy in the process
+        for arr in (actions, index, over, under):
+            if arr is not None:
+                arr.flags.writeable = False
+
+        # Nested lists for the scalar engine, NumPy item access is much slower
+        self.action_rows: list = actions.tolist()
+        if index is not None:
+            self.index_rows: list = np.where(np.isnan(index), None, index).tolist()
+            self.over_rows: list = over.tolist()
+            self.under_rows: list = under.tolist()
+
+    def to_dataframe(self, two_cards: bool = True):
+        # pandas is only needed here, so importing blackjack_sim stays light
+        import pandas as pd
+
+        col = TWO_CARDS if two_cards else MORE_CARDS
+        states = [s for s in range(N_STATES) if (self.actions[s, :, col] != NO_ACTION).all()]
+        return pd.DataFrame(
+            [[ACTIONS[code].value for code in self.actions[s, :, col]] for s in states],
+            index=[state_name(s) for s in states],
+            columns=DEALER_CARD_NAMES,
+        )
+
+
+def state_name(state: int) -> str:
+    # Inverse of _parse_hand
+    if state >= PAIR_STATE:
+        value = state - PAIR_STATE
+        name = "A" if value == 11 else "T" if value == 10 else str(value)
+        return f"{name},{name}"
+    if state >= SOFT_STATE:
+        total = state - SOFT_STATE
+        return "A,A" if total == 12 else f"A,{total - 11}"
+    return str(state)
+
+
+def _read_csv(file: Path) -> list[dict]:
+    with open(file, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _parse_hand(hand_name: str) -> int:
+    # "H16" is the hard 16 alone, as write_indices names hard hands
+    if "," not in hand_name:
+        return int(hand_name.removeprefix("H"))
+    first, second = hand_name.split(",")
+    if first == second:
+        return PAIR_STATE + (11 if first == "A" else 10 if first == "T" else int(first))
+    return SOFT_STATE + 11 + int(second)
+
+
+def compile_standard(file: Path = STANDARD_FILE, rules: Rules = Rules()) -> np.ndarray:
+    """Compiles a basic strategy chart into (state, upcard, column) codes.
+
+    Doubles are "D" (else hit) or "Ds" (else stand), surrenders "Rh" or "Rs"
+    and pairs "Y", "N", "Y/N", split only when `rules` allow doubling after
+    splits, or "Rp", surrender when `rules` offer it and split otherwise. A
+    chart entry that is not recognised raises ValueError rather than being
+    skipped.
+    """
+    codes = np.full((N_STATES, 10, 3), NO_ACTION)
+    splits = np.zeros((N_STATES, 10), dtype=bool)
+    surrenders = np.zeros((N_STATES, 10), dtype=bool)
+    entries = chart_codes(rules)
+    del entries["P"]
+    for row in _read_csv(file):
+        state = _parse_hand(row["Hand"])
+        for u, dcn in enumerate(DEALER_CARD_NAMES):
+            entry = row[dcn]
+            if state >= PAIR_STATE:
+                if entry not in PAIR_CODES:
+                    raise ValueError(f"Unknown pair entry {entry!r} for {row['Hand']} against {dcn} in {file}")
+                splits[state, u] = entry in ("Y", "Rp") or (entry == "Y/N" and rules.double_after_split)
+                surrenders[state, u] = entry == "Rp" and rules.surrender
+            elif entry in entries:
+                codes[state, u] = entries[entry]
+            else:
+                raise ValueError(f"Unknown entry {entry!r} for {row['Hand']} against {dcn} in {file}")
+
+    # Two aces are the only soft 12, left after a split that cannot be resplit
+    # or when not split, and always hit
+    codes[SOFT_STATE + 12] = HIT
+    # Pairs that are not split are played on their hard or soft total
+    for value in range(2, 12):
+        played = codes[SOFT_STATE + 12] if value == 11 else codes[2 * value]
+        codes[PAIR_STATE + value] = np.where(splits[PAIR_STATE + value, :, None], SPLIT, played)
+        two_cards = codes[PAIR_STATE + value, :, TWO_CARDS]
+        two_cards[surrenders[PAIR_STATE + value]] = SURRENDER
+    return codes
+
+
+def _states_with_total(total: int) -> list[int]:
+    # Index plays are keyed on hand value, so they cover hard, soft and pair hands
+    # alike, except two aces: a soft 12 is never played like a hard 12
+    states = [total]
+    if 13 <= total <= 21:
+        states.append(SOFT_STATE + total)
+    if total % 2 == 0 and 4 <= total <= 20:
+        states.append(PAIR_STATE + total // 2)
+    return states
+
+
+def compile_deviations(file: Path = I18_FILE, rules: Rules = Rules()) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compiles index plays into (state, upcard) indices and (state, upcard, column) codes.
+
+    `hand_value` is a total, covering hard, soft and pair hands with that
+    value, or a hand name such as "H16", "A,7" or "T,T" for that hand alone.
+    Rows are applied in order, so a named hand can refine a total before it.
+    """
+    index = np.full((N_STATES, 10), np.nan)
+    over = np.full((N_STATES, 10, 3), NO_ACTION)
+    under = np.full((N_STATES, 10, 3), NO_ACTION)
+    entries = chart_codes(rules)
+    for row in _read_csv(file):
+        # dealer 1 is an ace
+        u = int(row["dealer"]) - 1
+        hand = row["hand_value"]
+        states = _states_with_total(int(hand)) if hand.isdigit() else [_parse_hand(hand)]
+        for state in states:
+            index[state, u] = float(row["index"])
+            over[state, u] = entries[row["decision_over"]]
+            under[state, u] = entries[row["decision_under"]]
+    return index, over, under
+
+
+# Compiled once per process on first use, `file` is a chart like standard_strategy.csv
+@cache
+def standard_table(file: str | Path = STANDARD_FILE, rules: Rules = Rules()) -> StrategyTable:
+    return StrategyTable(compile_standard(Path(file), rules))
+
+
+@cache
+def i18_table(
+    index_shift: float = 0,
+    file: str | Path = STANDARD_FILE,
+    rules: Rules = Rules(),
+    index_file: str | Path = I18_FILE,
+) -> StrategyTable:
+    index, over, under = compile_deviations(Path(index_file), rules)
+    return StrategyTable(compile_standard(Path(file), rules), index + index_shift, over, under)
@@ -1,2 +1,2 @@
-def estimate_rounds(shoe, n_players):
-    return int((shoe.shoe_size - shoe.idx) / 2.7 / (n_players + 1) * 1.5)
\ No newline at end of file
+# Bump whenever a change alters simulated results for the same seed, so cached results are not reused
+ENGINE_VERSION = 5
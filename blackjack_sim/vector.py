@@ -0,0 +1,405 @@
+from functools import partial
+from inspect import signature
+
+import numpy as np
+
+from blackjack_sim.base import (
+    PAIR_STATE,
+    SOFT_STATE,
+    UPCARD_INDEX,
+    Shoe,
+)
+from blackjack_sim.counting import COUNT_SYSTEMS
+from blackjack_sim.rules import (
+    BLACKJACK,
+    LOSS,
+    PUSH,
+    SPLIT_21,
+    SURRENDERED,
+    WIN,
+    Rules,
+)
+from blackjack_sim.stats import OutcomeStats
+from blackjack_sim.strategy import (
+    DumbassStrategy,
+    I18Strategy,
+    StandardStrategy,
+)
+from blackjack_sim.tables import (
+    DHIT,
+    HIT,
+    I18_FILE,
+    NO_ACTION,
+    SPLIT,
+    STANDARD_FILE,
+    STAY,
+    SURRENDER,
+    i18_table,
+)
+
+# Indexed by Card.rank
+RANK_VALUES = np.array([11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10])
+HI_LO = np.array(COUNT_SYSTEMS["hi_lo"])
+UPCARD = np.array(UPCARD_INDEX)
+
+
+def random_shoes(n_shoes: int, n_decks: int = 6, rng: np.random.Generator | None = None) -> np.ndarray:
+    # Each row is a shuffled shoe followed by a shuffled backup shoe, mirroring Shoe.backup_cards
+    rng = np.random.default_rng() if rng is None else rng
+    deck = np.tile(np.arange(13, dtype=np.uint8), 4 * n_decks)
+    return rng.permuted(np.tile(deck, (n_shoes, 2)).reshape(n_shoes, 2, -1), axis=2).reshape(n_shoes, -1)
+
+
+def shoe_ranks(shoe: Shoe) -> np.ndarray:
+    # Rank row for an existing Shoe, in the order Shoe.deal would hand out cards
+    return np.concatenate([shoe.cards, shoe.backup_cards[::-1]])
+
+
+class VectorGame:
+    """Plays many independent shoes in lockstep, one seat per strategy class.
+
+    `shoes` is a (n_shoes, n_cards) rank matrix, see `rng.shoe_orders`, such
+    as the rows of a corpus.ShoeCorpus. Tables advance one decision at a time
+    with array operations and follow the same rules as `Game`, so given the
+    same card order they end on the same balances.
+    """
+
+    def __init__(
+        self,
+        shoes: np.ndarray,
+        strategies: list[type | partial],
+        n_decks: int = 6,
+        pen: float = .9,
+        idx: int = 0,
+        rules: Rules = Rules(),
+    ):
+        # A strategy is a class, or a functools.partial of one setting its keyword parameters
+        self.strategies = []
+        self.params = []
+        for strategy in strategies:
+            cls, kwargs = (strategy.func, strategy.keywords) if isinstance(strategy, partial) else (strategy, {})
+            if cls not in (DumbassStrategy, StandardStrategy, I18Strategy):
+                raise ValueError(f"Unsupported strategy for vectorized play: {cls.__name__}")
+            defaults = {
+                name: p.default for name, p in signature(cls).parameters.items() if p.default is not p.empty
+            }
+            # Only the Hi-Lo count is tracked
+            if kwargs.get("count_system", "hi_lo") != "hi_lo":
+                raise ValueError(f"Unsupported count system for vectorized play: {kwargs['count_system']}")
+            self.strategies.append(cls)
+            self.params.append({**defaults, **kwargs})
+        self.rules = rules
+        self.payouts = np.array(rules.payouts)
+        self.shoes = np.asarray(shoes)
+        self.n_shoes = len(self.shoes)
+        self.n_seats = len(self.strategies)
+        self.shoe_size = n_decks * 52
+        self.pen_idx = int(self.shoe_size * pen)
+
+        self.pos = np.full(self.n_shoes, idx)
+        self.count = HI_LO[self.shoes[:, :idx]].sum(axis=1)
+        self.balances = np.zeros((self.n_shoes, self.n_seats))
+        self.rounds = np.zeros(self.n_shoes, dtype=int)
+        self.hands_played = np.zeros((self.n_shoes, self.n_seats), dtype=int)
+        # Sum over rounds of squared round PnL, for per-round variance
+        self.round_pnl_sq = np.zeros((self.n_shoes, self.n_seats))
+        self.peak_balances = np.zeros((self.n_shoes, self.n_seats))
+        self.max_drawdown = np.zeros((self.n_shoes, self.n_seats))
+
+        # Strategies play the table's rules unless given others, as in Game
+        self.tables = [
+            i18_table(
+                params.get("index_shift", 0),
+                params.get("strategy_file", STANDARD_FILE),
+                params.get("rules") or rules,
+                params.get("index_file", I18_FILE),
+            )
+            for params in self.params
+        ]
+        self.double_after_split = [(params.get("rules") or rules).double_after_split for params in self.params]
+
+    def play(self):
+        live = self.pos < self.pen_idx
+        while live.any():
+            t = np.flatnonzero(live)
+            start = self.balances[t]
+            self.play_round(t)
+            self.round_pnl_sq[t] += (self.balances[t] - start) ** 2
+            self.peak_balances[t] = np.maximum(self.peak_balances[t], self.balances[t])
+            self.max_drawdown[t] = np.maximum(self.max_drawdown[t], self.peak_balances[t] - self.balances[t])
+            live = self.pos < self.pen_idx
+
+    def add_to(self, stats: OutcomeStats):
+        # Adds the finished shoes to a summary with one seat per strategy
+        stats.add_shoes(
+            pnl=self.balances,
+            rounds=np.repeat(self.rounds[:, None], self.n_seats, axis=1),
+            hands=self.hands_played,
+            round_pnl_sq=self.round_pnl_sq,
+            max_drawdown=self.max_drawdown,
+        )
+
+    def play_round(self, t: np.ndarray):
+        n, n_seats = len(t), self.n_seats
+        self.rounds[t] += 1
+
+        # Per round hand state, indexed by (table, seat, hand)
+        self._alloc_hands(n, n_seats, 2)
+
+        up = self._deal(t)
+        hole_pos = self.pos[t].copy()
+        hole = self._deal(t, count=False)
+        u = UPCARD[up]
+
+        rows = np.arange(n)
+        zeros = np.zeros(n, dtype=int)
+        for s in range(n_seats):
+            seats = np.full(n, s)
+            bet = self._bet_size(t, s)
+            self.balances[t, s] -= bet
+            self.bet[:, s, 0] = bet
+            self.n_hands[:, s] = 1
+            self._hit(rows, seats, zeros, self._deal(t))
+            self._hit(rows, seats, zeros, self._deal(t))
+
+        dealer_total = RANK_VALUES[up] + RANK_VALUES[hole]
+        dealer_bj = dealer_total == 21
+
+        # Insurance costs half the initial bet
+        for s in range(n_seats):
+            if self.strategies[s] is I18Strategy:
+                insured = (up == 0) & (self._true_count(t) >= self.params[s]["insurance_index"])
+                won = np.where(dealer_bj, self.rules.insurance_payout, -1)
+                self.balances[t, s] += np.where(insured, won * self.bet[:, s, 0] / 2, 0)
+
+        # anyone home?
+        if dealer_bj.any():
+            b = np.flatnonzero(dealer_bj)
+            push = self.total[b, :, 0] == 21
+            self.balances[t[b]] += np.where(push, self.payouts[PUSH] * self.bet[b, :, 0], 0)
+            self.hands_played[t[b]] += 1
+            self._reveal(t[b], hole_pos[b], hole[b])
+
+        p = np.flatnonzero(~dealer_bj)
+        if not len(p):
+            return
+        for s in range(n_seats):
+            self._handle_player(t, p, s, u)
+        dealer_total = self._handle_dealer(t, p, up, hole, hole_pos)
+        self._settle(t, p, dealer_total)
+
+    def _alloc_hands(self, n: int, n_seats: int, n_hands: int):
+        shape = (n, n_seats, n_hands)
+        self.total = np.zeros(shape, dtype=int)
+        self.soft_aces = np.zeros(shape, dtype=int)
+        self.n_cards = np.zeros(shape, dtype=int)
+        self.first = np.zeros(shape, dtype=int)
+        self.second = np.zeros(shape, dtype=int)
+        self.bet = np.zeros(shape)
+        self.from_split = np.zeros(shape, dtype=bool)
+        self.split_allowed = np.full(shape, self.rules.max_hands > 1)
+        self.surrendered = np.zeros(shape, dtype=bool)
+        self.n_hands = np.zeros((n, n_seats), dtype=int)
+
+    def _grow_hands(self):
+        # The hand axis grows on demand, new hands are set up when split off
+        for name in ("total", "soft_aces", "n_cards", "first", "second", "bet", "from_split", "split_allowed", "surrendered"):
+            arr = getattr(self, name)
+            setattr(self, name, np.concatenate([arr, np.zeros_like(arr)], axis=2))
+
+    def _deal(self, t: np.ndarray, count: bool = True) -> np.ndarray:
+        pos = self.pos[t]
+        cards = self.shoes[t, pos]
+        if count:
+            # cards past the shoe come from the backup deck and are never counted
+            self.count[t] += np.where(pos < self.shoe_size, HI_LO[cards], 0)
+        self.pos[t] += 1
+        return cards
+
+    def _reveal(self, t: np.ndarray, hole_pos: np.ndarray, hole: np.ndarray):
+        self.count[t] += np.where(hole_pos < self.shoe_size, HI_LO[hole], 0)
+
+    def _true_count(self, t: np.ndarray) -> np.ndarray:
+        cards_left_approx = self.shoe_size - np.minimum(self.pos[t], self.shoe_size) + 1
+        return self.count[t] / cards_left_approx * 52
+
+    def _bet_size(self, t: np.ndarray, s: int) -> np.ndarray:
+        if self.strategies[s] is DumbassStrategy:
+            return np.ones(len(t))
+        min_bet, max_bet = self.params[s]["min_bet"], self.params[s]["max_bet"]
+        bet = np.clip(np.trunc(self._true_count(t)), min_bet, max_bet)
+        return np.where(self.pos[t] < self.pen_idx, bet, min_bet)
+
+    def _hit(self, r: np.ndarray, s: np.ndarray, h: np.ndarray, cards: np.ndarray):
+        total = self.total[r, s, h] + RANK_VALUES[cards]
+        soft_aces = self.soft_aces[r, s, h] + (cards == 0)
+        # a single card never needs more than one ace to be hardened
+        harden = (total > 21) & (soft_aces > 0)
+        self.total[r, s, h] = total - 10 * harden
+        self.soft_aces[r, s, h] = soft_aces - harden
+        n_cards = self.n_cards[r, s, h]
+        self.first[r, s, h] = np.where(n_cards == 0, cards, self.first[r, s, h])
+        self.second[r, s, h] = np.where(n_cards == 1, cards, self.second[r, s, h])
+        self.n_cards[r, s, h] = n_cards + 1
+
+    def _reset(self, r: np.ndarray, s: np.ndarray, h: np.ndarray, card: np.ndarray):
+        self.total[r, s, h] = 0
+        self.soft_aces[r, s, h] = 0
+        self.n_cards[r, s, h] = 0
+        self._hit(r, s, h, card)
+
+    def _action(self, t: np.ndarray, r: np.ndarray, s: int, h: np.ndarray, u: np.ndarray) -> np.ndarray:
+        total = self.total[r, s, h]
+        soft_aces = self.soft_aces[r, s, h]
+        n_cards = self.n_cards[r, s, h]
+        first = self.first[r, s, h]
+        from_split = self.from_split[r, s, h]
+        pair = self.split_allowed[r, s, h] & (n_cards == 2) & (RANK_VALUES[first] == RANK_VALUES[self.second[r, s, h]])
+
+        strategy = self.strategies[s]
+        if strategy is DumbassStrategy:
+            can_double = (n_cards == 2) & (self.double_after_split[s] | ~from_split)
+            return np.select(
+                [pair, (total == 11) & can_double, total < 17],
+                [SPLIT, DHIT, HIT],
+                STAY
+            )
+
+        state = np.where(pair, PAIR_STATE + RANK_VALUES[first], np.where(soft_aces > 0, SOFT_STATE + total, total))
+        # Table column, see tables.column
+        two_cards = (n_cards == 2) * (1 + from_split)
+        table = self.tables[s]
+        action = table.actions[state, u, two_cards]
+
+        if strategy is I18Strategy:
+            active = self.pos[t] < self.pen_idx
+            index = table.index[state, u]
+            over = table.over[state, u, two_cards]
+            under = table.under[state, u, two_cards]
+            deviation = np.where(self._true_count(t) < index, under, over)
+            deviation = np.where(active & ~np.isnan(index), deviation, NO_ACTION)
+            action = np.where(deviation != NO_ACTION, deviation, action)
+
+        return action
+
+    def _handle_player(self, t_round: np.ndarray, p: np.ndarray, s: int, u_round: np.ndarray):
+        current = np.zeros(len(t_round), dtype=int)
+        # hands waiting to be played after a split, played last in first out
+        stack = np.zeros((len(t_round), self.total.shape[2]), dtype=int)
+        stack_size = np.zeros(len(t_round), dtype=int)
+        todo = np.zeros(len(t_round), dtype=bool)
+        todo[p] = True
+
+        def advance(r):
+            has_next = stack_size[r] > 0
+            nxt, done = r[has_next], r[~has_next]
+            stack_size[nxt] -= 1
+            current[nxt] = stack[nxt, stack_size[nxt]]
+            todo[done] = False
+
+        while todo.any():
+            r = np.flatnonzero(todo)
+            h = current[r]
+            finished = self.total[r, s, h] >= 21
+            if finished.any():
+                advance(r[finished])
+                r, h = r[~finished], h[~finished]
+                if not len(r):
+                    continue
+
+            t = t_round[r]
+            action = self._action(t, r, s, h, u_round[r])
+            seats = np.full(len(r), s)
+            if not self.rules.hit_split_aces:
+                # Split aces get one card each, only a resplit is up to the player
+                locked = self.from_split[r, s, h] & (self.first[r, s, h] == 0) & (action != SPLIT)
+                action = np.where(locked, STAY, action)
+
+            hit = action == HIT
+            if hit.any():
+                self._hit(r[hit], seats[hit], h[hit], self._deal(t[hit]))
+
+            double = action == DHIT
+            if double.any():
+                rd, hd = r[double], h[double]
+                self.balances[t[double], s] -= self.bet[rd, s, hd]
+                self.bet[rd, s, hd] *= 2
+                self._hit(rd, seats[double], hd, self._deal(t[double]))
+                advance(rd)
+
+            stay = action == STAY
+            if stay.any():
+                advance(r[stay])
+
+            surrender = action == SURRENDER
+            if surrender.any():
+                self.surrendered[r[surrender], s, h[surrender]] = True
+                advance(r[surrender])
+
+            split = action == SPLIT
+            if split.any():
+                rs, hs, ss, ts = r[split], h[split], seats[split], t[split]
+                if (self.n_hands[rs, s] >= self.total.shape[2]).any():
+                    self._grow_hands()
+                    stack = np.concatenate([stack, np.zeros_like(stack)], axis=1)
+                new = self.n_hands[rs, s]
+                self.n_hands[rs, s] += 1
+                self.balances[ts, s] -= self.bet[rs, s, hs]
+                self.bet[rs, s, new] = self.bet[rs, s, hs]
+                self.from_split[rs, s, new] = self.from_split[rs, s, hs] = True
+                self.split_allowed[rs, s, new] = self.split_allowed[rs, s, hs]
+                first, second = self.first[rs, s, hs], self.second[rs, s, hs]
+                self._reset(rs, ss, new, second)
+                self._hit(rs, ss, new, self._deal(ts))
+                self._reset(rs, ss, hs, first)
+                self._hit(rs, ss, hs, self._deal(ts))
+                stack[rs, stack_size[rs]] = new
+                stack_size[rs] += 1
+                # No more splits once the limit is reached, or after splitting aces without resplits
+                limit = self.n_hands[rs, s] >= self.rules.max_hands
+                self.split_allowed[rs[limit], s] = False
+                if not self.rules.resplit_aces:
+                    aces = first == 0
+                    self.split_allowed[rs[aces], s, hs[aces]] = False
+                    self.split_allowed[rs[aces], s, new[aces]] = False
+
+    def _handle_dealer(self, t_round, p, up, hole, hole_pos) -> np.ndarray:
+        t = t_round[p]
+        self._reveal(t, hole_pos[p], hole[p])
+        total = RANK_VALUES[up[p]] + RANK_VALUES[hole[p]]
+        soft_aces = (up[p] == 0).astype(int) + (hole[p] == 0)
+        harden = total > 21
+        total, soft_aces = total - 10 * harden, soft_aces - harden
+        hit_soft_17 = self.rules.hit_soft_17
+
+        drawing = (total < 17) | ((total == 17) & (soft_aces > 0) & hit_soft_17)
+        while drawing.any():
+            d = np.flatnonzero(drawing)
+            cards = self._deal(t[d])
+            total[d] += RANK_VALUES[cards]
+            soft_aces[d] += cards == 0
+            harden = (total[d] > 21) & (soft_aces[d] > 0)
+            total[d] -= 10 * harden
+            soft_aces[d] -= harden
+            drawing = (total < 17) | ((total == 17) & (soft_aces > 0) & hit_soft_17)
+
+        # bust is -1, as Hand.value() reports it
+        return np.where(total > 21, -1, total)
+
+    def _settle(self, t_round, p, dealer_total):
+        t = t_round[p]
+        hands = np.arange(self.total.shape[2])
+        in_play = hands[None, None, :] < self.n_hands[p][:, :, None]
+        total = self.total[p]
+        value = np.where(total > 21, -1, total)
+        blackjack = (self.n_cards[p] == 2) & (total == 21)
+        dealer_value = dealer_total[:, None, None]
+
+        # The same outcomes as game.hand_outcome
+        outcome = np.select(
+            [self.surrendered[p], (value == -1) | (value < dealer_value), value == dealer_value, blackjack & self.from_split[p], blackjack],
+            [SURRENDERED, LOSS, PUSH, SPLIT_21, BLACKJACK],
+            WIN,
+        )
+        self.balances[t] += (self.payouts[outcome] * self.bet[p] * in_play).sum(axis=2)
+        self.hands_played[t] += self.n_hands[p]
@@ -1,38 +1,29 @@
-from collections import Counter
-from copy import deepcopy
 import numpy as np
 
 from blackjack_sim import (
     DumbassStrategy,
-    Dealer,
-    Game,
     I18Strategy,
-    Player,
-    Shoe,
-    StandardStrategy
+    StandardStrategy,
+    VectorGame,
+    random_shoes,
 )
 
-def run_strat(strat_class, shoe):
-    dealer = Dealer()
-    strat = strat_class(dealer=dealer, shoe=shoe)
-    players = [
-        Player(strategy=strat)
-    ]
-    game = Game(
-        dealer=dealer,
-        shoe=shoe,
-        players=players
+def run_strat(strat_class, shoes):
+    game = VectorGame(
+        shoes=shoes,
+        strategies=[strat_class],
+        n_decks=6,
+        pen=.85
     )
     game.play()
-    return players[0].balance
-
-def iter():
-    shoe = Shoe(n_decks=6, pen=.85)
-    balances = []
-    balances.append(run_strat(DumbassStrategy, deepcopy(shoe)))
-    balances.append(run_strat(StandardStrategy, deepcopy(shoe)))
-    balances.append(run_strat(I18Strategy, deepcopy(shoe)))
-    return np.array(balances)
+    return game.balances[:, 0]
 
 nsims = 2000
-print(np.array([iter() for _ in range(nsims)]).mean(axis = 0))
\ No newline at end of file
+# Every strategy plays the same shoes
+shoes = random_shoes(n_shoes=nsims, n_decks=6)
+balances = np.column_stack([
+    run_strat(DumbassStrategy, shoes),
+    run_strat(StandardStrategy, shoes),
+    run_strat(I18Strategy, shoes),
+])
+print(balances.mean(axis = 0))
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from timeit import timeit
+
+from blackjack_sim import (
+    Dealer,
+    I18Strategy,
+    Shoe,
+    StandardStrategy,
+)
+
+# Budgets, in milliseconds. Worker processes pay the import once and
+# build strategies once per shoe, so both stay on the hot path.
+IMPORT_BUDGET_MS = 300
+CONSTRUCTION_BUDGET_MS = .05
+
+def import_ms(repeat=5):
+    # Fresh interpreter each time, so nothing is already cached
+    code = "import time; t = time.perf_counter(); import blackjack_sim; print(time.perf_counter() - t)"
+    times = [
+        float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+        for _ in range(repeat)
+    ]
+    return min(times) * 1000
+
+def construction_ms(strat_class, number=10000):
+    dealer = Dealer()
+    shoe = Shoe()
+    return timeit(lambda: strat_class(dealer=dealer, shoe=shoe), number=number) / number * 1000
+
+if __name__ == "__main__":
+    results = {
+        "import blackjack_sim": (import_ms(), IMPORT_BUDGET_MS),
+        "StandardStrategy()": (construction_ms(StandardStrategy), CONSTRUCTION_BUDGET_MS),
+        "I18Strategy()": (construction_ms(I18Strategy), CONSTRUCTION_BUDGET_MS),
+    }
+    over_budget = False
+    for name, (ms, budget) in results.items():
+        status = "ok" if ms <= budget else "OVER BUDGET"
+        over_budget |= ms > budget
+        print(f"{name:<22} {ms:10.4f} ms  (budget {budget} ms)  {status}")
+    sys.exit(1 if over_budget else 0)
@@ -1,4 +1,5 @@
 from blackjack_sim import (
+    ConsoleObserver,
     DumbassStrategy,
     Dealer,
     Game,
@@ -18,6 +19,6 @@ game = Game(
     dealer=dealer,
     shoe=shoe,
     players=players,
-    interactive=True
+    observer=ConsoleObserver()
 )
-game.play()
\ No newline at end of file
+game.play()
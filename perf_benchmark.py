@@ -0,0 +1,245 @@
+import argparse
+import json
+import platform
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from blackjack_sim import (
+    Dealer,
+    Game,
+    Hand,
+    I18Strategy,
+    Player,
+    Shoe,
+    StandardStrategy,
+    handle_dealer,
+    handle_player,
+    shoe_orders,
+)
+
+# Per-call latency and throughput of the hot paths. Each benchmark runs
+# `inner` calls per sample and returns the seconds spent in the measured
+# calls only, so setup such as dealing the hands is left out. Most calls are
+# far too short to time one by one, so a sample is the mean over its `inner`
+# calls and the percentiles are of those batch means, not of single calls:
+# they show how steady the timing is, not the tail latency of a call.
+BASELINE = Path(__file__).resolve().parent / "perf_baseline.json"
+# A median batch mean this much slower than the baseline is a regression.
+# Timings on a shared machine easily vary by 20%, hence the slack.
+TOLERANCE = .5
+SEED = 0
+
+def hands_for(shoe, n):
+    # Two card player hands with a dealer upcard, as strategies see them
+    dealer = Dealer()
+    cases = []
+    for _ in range(n):
+        if not shoe.is_active():
+            shoe = shoe_order().fork()
+        hand = Hand(bet=1)
+        hand.hit(shoe.deal())
+        hand.hit(shoe.deal())
+        upcard = Hand()
+        upcard.hit(shoe.deal())
+        cases.append((hand, upcard))
+    return dealer, cases
+
+def shoe_order():
+    return Shoe(rng=np.random.default_rng(SEED))
+
+def bench_shoe_construction(inner):
+    rng = np.random.default_rng(SEED)
+    t = perf_counter()
+    for _ in range(inner):
+        Shoe(rng=rng)
+    return perf_counter() - t, 0
+
+def bench_shoe_orders(inner):
+    t = perf_counter()
+    shoe_orders(SEED, 0, inner)
+    return perf_counter() - t, 0
+
+def bench_shoe_deal(inner):
+    order = shoe_order()
+    elapsed = 0.
+    left = inner
+    while left:
+        shoe = order.fork()
+        n = min(left, 250)
+        t = perf_counter()
+        for _ in range(n):
+            shoe.deal()
+        elapsed += perf_counter() - t
+        left -= n
+    return elapsed, 0
+
+def bench_hand_value(inner):
+    _, cases = hands_for(shoe_order().fork(), 100)
+    hands = [hand for hand, _ in cases] * (inner // 100 + 1)
+    t = perf_counter()
+    for hand in hands[:inner]:
+        hand.value()
+    return perf_counter() - t, 0
+
+def bench_hand_hit(inner):
+    shoe = shoe_order().fork()
+    cards = [shoe.deal() for _ in range(3 * 100)]
+    elapsed = 0.
+    # Three cards to a hand, so `inner` should be a multiple of three
+    for start in range(0, inner, 3):
+        hand = Hand()
+        t = perf_counter()
+        for card in cards[start % 300:start % 300 + 3]:
+            hand.hit(card)
+        elapsed += perf_counter() - t
+    return elapsed, 0
+
+def strategy_bench(strat_class, method):
+    def bench(inner):
+        shoe = shoe_order().fork()
+        dealer, cases = hands_for(shoe, inner)
+        strategy = strat_class(dealer=dealer, shoe=shoe)
+        call = getattr(strategy, method)
+        elapsed = 0.
+        for hand, upcard in cases:
+            dealer.hand = upcard
+            t = perf_counter()
+            call(hand)
+            elapsed += perf_counter() - t
+        return elapsed, 0
+    return bench
+
+def bench_handle_player(inner):
+    order = shoe_order()
+    shoe = order.fork()
+    dealer = Dealer()
+    player = Player(strategy=I18Strategy(dealer=dealer, shoe=shoe))
+    elapsed = 0.
+    for _ in range(inner):
+        if shoe.idx > shoe.pen_idx:
+            shoe = order.fork()
+            player.strategy.shoe = shoe
+        dealer.hand = Hand()
+        dealer.hand.hit(shoe.deal())
+        player.hands = [Hand(bet=1)]
+        player.hands[0].hit(shoe.deal())
+        player.hands[0].hit(shoe.deal())
+        t = perf_counter()
+        handle_player(player, shoe)
+        elapsed += perf_counter() - t
+    return elapsed, inner
+
+def bench_handle_dealer(inner):
+    order = shoe_order()
+    shoe = order.fork()
+    dealer = Dealer()
+    elapsed = 0.
+    for _ in range(inner):
+        if shoe.idx > shoe.pen_idx:
+            shoe = order.fork()
+        dealer.hand = Hand()
+        dealer.hand.hit(shoe.deal())
+        dealer.hand.hit(shoe.deal(reserve_count=True))
+        t = perf_counter()
+        handle_dealer(dealer, shoe)
+        elapsed += perf_counter() - t
+    return elapsed, 0
+
+def game_bench(n_seats):
+    def bench(inner):
+        rng = np.random.default_rng(SEED)
+        elapsed = 0.
+        hands = 0
+        for _ in range(inner):
+            dealer = Dealer()
+            shoe = Shoe(rng=rng)
+            players = [Player(strategy=I18Strategy(dealer=dealer, shoe=shoe)) for _ in range(n_seats)]
+            game = Game(dealer=dealer, shoe=shoe, players=players)
+            t = perf_counter()
+            game.play()
+            elapsed += perf_counter() - t
+            hands += sum(game.hands_played)
+        return elapsed, hands
+    return bench
+
+# name -> (benchmark, calls per sample)
+BENCHMARKS = {
+    "Shoe()": (bench_shoe_construction, 20),
+    "shoe_orders per shoe": (bench_shoe_orders, 500),
+    "Shoe.deal": (bench_shoe_deal, 2000),
+    "Hand.value": (bench_hand_value, 2000),
+    "Hand.hit": (bench_hand_hit, 2100),
+    "StandardStrategy.action": (strategy_bench(StandardStrategy, "action"), 2000),
+    "I18Strategy.check_i18": (strategy_bench(I18Strategy, "check_i18"), 2000),
+    "handle_player": (bench_handle_player, 1000),
+    "handle_dealer": (bench_handle_dealer, 1000),
+    "Game.play 1 seat": (game_bench(1), 2),
+    "Game.play 3 seats": (game_bench(3), 2),
+    "Game.play 7 seats": (game_bench(7), 1),
+}
+
+def run(name, samples):
+    bench, inner = BENCHMARKS[name]
+    bench(inner)  # warm up caches and tables
+    batch_means, elapsed, hands = [], 0., 0
+    for _ in range(samples):
+        seconds, n_hands = bench(inner)
+        batch_means.append(seconds / inner)
+        elapsed += seconds
+        hands += n_hands
+    p50, p90, p99 = np.percentile(batch_means, [50, 90, 99]) * 1e6
+    return {
+        "calls": samples * inner,
+        "batch_p50_us": round(p50, 4),
+        "batch_p90_us": round(p90, 4),
+        "batch_p99_us": round(p99, 4),
+        "hands_per_sec": round(hands / elapsed) if hands else None,
+    }
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["batch_p50_us"] / baseline[name]["batch_p50_us"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths.")
+    parser.add_argument("--samples", type=int, default=30)
+    parser.add_argument("--only", nargs="*", default=list(BENCHMARKS), help="benchmark names to run")
+    parser.add_argument("--output", type=Path, help="write results to this JSON file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with these results")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = {name: run(name, args.samples) for name in args.only}
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+
+    print(f"{'benchmark':<26} {'batch p50':>10} {'batch p90':>10} {'batch p99':>10} {'hands/s':>10} {'vs base':>8}")
+    for name, r in results.items():
+        hands = f"{r['hands_per_sec']:10.0f}" if r["hands_per_sec"] else f"{'':>10}"
+        vs = f"{r['batch_p50_us'] / baseline[name]['batch_p50_us']:7.2f}x" if name in baseline else f"{'':>8}"
+        print(f"{name:<26} {r['batch_p50_us']:10.3f} {r['batch_p90_us']:10.3f} {r['batch_p99_us']:10.3f} {hands} {vs}")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, ratio in regressions:
+        print(f"REGRESSION {name}: {ratio:.2f}x the baseline median batch mean")
+    sys.exit(1 if regressions else 0)
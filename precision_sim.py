@@ -0,0 +1,20 @@
+import os
+
+from blackjack_sim import (
+    I18Strategy,
+    StandardStrategy,
+    run_until_precision,
+)
+
+# Instead of guessing a number of shoes, play until the EV per round
+# of each strategy is pinned down, then until the I18 edge over
+# basic strategy is, which needs far fewer shoes since both play the
+# same cards.
+
+if __name__ == "__main__":
+    workers = os.cpu_count()
+    each = run_until_precision([StandardStrategy, I18Strategy], target_se=.005, workers=workers, seed=0)
+    print(each.summary())
+
+    paired = run_until_precision([StandardStrategy, I18Strategy], ci_width=.01, baseline=0, workers=workers, seed=0)
+    print(paired.summary())
@@ -0,0 +1,27 @@
+import os
+
+import numpy as np
+
+from blackjack_sim import (
+    I18Strategy,
+    StandardStrategy,
+    run_sessions,
+)
+
+# Sit through consecutive shoes, or a continuous shuffling machine, with one
+# bankroll per session: 4 hours at 100 rounds an hour.
+
+if __name__ == "__main__":
+    for csm in (False, True):
+        results = run_sessions(
+            [StandardStrategy, I18Strategy], n_sessions=200, n_rounds=400,
+            workers=os.cpu_count(), seed=0, bankroll=200, csm=csm,
+        )
+        pnl = np.array([r.pnl for r in results])
+        drawdown = np.array([r.max_drawdown for r in results])
+        print("continuous shuffler" if csm else f"{np.mean([r.shoes for r in results]):.1f} shoes per session")
+        for k, name in enumerate(("StandardStrategy", "I18Strategy")):
+            print(
+                f"  {name:<18} {pnl[:, k].mean():>8.2f} units/session, sd {pnl[:, k].std():.1f}, "
+                f"losing {(pnl[:, k] < 0).mean():.2f}, median drawdown {np.median(drawdown[:, k]):.1f}"
+            )
@@ -22,4 +22,4 @@ game = Game(
 )
 game.play()
 
-print(game.player_balances)
\ No newline at end of file
+print([player.balance for player in players])
@@ -0,0 +1,72 @@
+import sys
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from blackjack_sim import (
+    Dealer,
+    DumbassStrategy,
+    Game,
+    I18Strategy,
+    Player,
+    Rules,
+    Shoe,
+    StandardStrategy,
+    VectorGame,
+    shoe_orders,
+)
+from blackjack_sim.solver import (
+    solve,
+    write_chart,
+)
+
+# VectorGame is meant to end every shoe on exactly the balances Game does.
+# This plays the same seeded shoes through both, seat for seat, under a few
+# rule sets, each with a chart solved for it so surrender and the split
+# rules come up, and exits 1 on any difference. Run it after touching either engine.
+SEED = 0
+N_SHOES = 200
+RULES = {
+    "default": Rules(),
+    "s17 6:5 no das": Rules(hit_soft_17=False, blackjack_payout=1.2, double_after_split=False),
+    "split limits": Rules(max_splits=1, resplit_aces=False, hit_split_aces=False),
+    "no splits": Rules(max_splits=0),
+    "surrender": Rules(surrender=True, split_21_is_blackjack=False, insurance_payout=1),
+}
+
+def strategies(chart):
+    return [
+        partial(I18Strategy, strategy_file=chart),
+        partial(StandardStrategy, strategy_file=chart),
+        DumbassStrategy,
+        partial(I18Strategy, strategy_file=chart, min_bet=2, max_bet=10, insurance_index=1.5, index_shift=-1),
+    ]
+
+def game_balances(rows, factories, rules, pen):
+    balances = []
+    for row in rows:
+        shoe = Shoe.from_deal_order(row, pen=pen)
+        dealer = Dealer(rules)
+        players = [Player(strategy=factory(dealer=dealer, shoe=shoe)) for factory in factories]
+        Game(dealer=dealer, shoe=shoe, players=players).play()
+        balances.append([p.balance for p in players])
+    return np.array(balances)
+
+if __name__ == "__main__":
+    pen = .85
+    rows = shoe_orders(SEED, 0, N_SHOES)
+    failed = False
+    with TemporaryDirectory() as tmp:
+        for k, (label, rules) in enumerate(RULES.items()):
+            chart = Path(tmp) / f"chart_{k}.csv"
+            write_chart(solve(rules), chart)
+            factories = strategies(chart)
+            expected = game_balances(rows, factories, rules, pen)
+            game = VectorGame(rows, factories, pen=pen, rules=rules)
+            game.play()
+            bad = np.flatnonzero(~np.isclose(expected, game.balances).all(axis=1))
+            print(f"{label:<16} {len(bad)} of {N_SHOES} shoes differ")
+            failed |= len(bad) > 0
+    sys.exit(1 if failed else 0)